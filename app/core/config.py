@@ -10,8 +10,90 @@ class Settings(BaseSettings):
     VERSION: str = "v1"
     DATABASE_URI: str = os.getenv("DATABASE_URI", "")
     TEST_DATABASE_URI: str = os.getenv("DATABASE_URI_TEST", "")
+    # Comma separated read replica URIs used for read-only queries
+    DATABASE_REPLICA_URIS: str = os.getenv("DATABASE_REPLICA_URIS", "")
+    TEST_DATABASE_REPLICA_URIS: str = os.getenv(
+        "DATABASE_REPLICA_URIS_TEST", "")
+    # Should exceed the health check interval, which is how stale the
+    # measured lag can get between checks.
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_HEALTH_CHECK_INTERVAL_SECONDS: float = 1.0
+    REPLICA_EJECT_SECONDS: float = 30.0
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
 
+    # Connection pools, created lazily in each process. Pool sizing does
+    # not apply to SQLite.
+    DATABASE_ECHO: bool = False
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT_SECONDS: float = 30.0
+    DATABASE_POOL_RECYCLE_SECONDS: int = 1800
+    DATABASE_POOL_PRE_PING: bool = True
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 5.0
+    REDIS_HEALTH_CHECK_INTERVAL_SECONDS: int = 30
+
+    # Production launcher; 0 workers means one per CPU
+    WEB_CONCURRENCY: int = 0
+
+    # "rq" hands orders to RQ workers through Redis; "embedded" processes
+    # them on an asyncio worker pool inside the API process.
+    EXECUTION_MODE: str = os.getenv("EXECUTION_MODE", "rq")
+    EMBEDDED_WORKERS: int = 4
+    EMBEDDED_QUEUE_SIZE: int = 10000
+    EMBEDDED_STATE_FILE: str = "embedded_pending.json"
+    EMBEDDED_SHUTDOWN_TIMEOUT_SECONDS: float = 10.0
+
+    # Admission control for POST /orders
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_SAMPLE_INTERVAL_SECONDS: float = 1.0
+    ADMISSION_MAX_QUEUE_DEPTH: int = 10000
+    ADMISSION_MAX_JOB_AGE_SECONDS: float = 60.0
+    ADMISSION_MAX_POOL_SATURATION: float = 0.95
+    ADMISSION_RETRY_AFTER_SECONDS: int = 5
+    # Off by default: without trusted proxies every client behind a load
+    # balancer shares the balancer's address and so a single bucket.
+    RATE_LIMIT_ENABLED: bool = False
+    RATE_LIMIT_CAPACITY: int = 50
+    RATE_LIMIT_REFILL_PER_SECOND: float = 10.0
+    # Comma separated gateway addresses trusted to set X-Client-Id;
+    # everyone else is rate limited by their own address.
+    RATE_LIMIT_TRUSTED_PROXIES: str = os.getenv(
+        "RATE_LIMIT_TRUSTED_PROXIES", "")
+
+    # Enqueue a binary order snapshot so workers skip the initial fetch
+    ORDER_SNAPSHOT_PAYLOADS: bool = False
+
+    # Coalesce concurrent order inserts into shared transactions
+    GROUP_COMMIT_ENABLED: bool = False
+    GROUP_COMMIT_WINDOW_MS: float = 2.0
+    GROUP_COMMIT_MAX_BATCH: int = 100
+    GROUP_COMMIT_TIMEOUT_SECONDS: float = 10.0
+
+    # Retention of finished job metadata in Redis
+    JOB_RESULT_TTL_SECONDS: int = 0
+    JOB_FAILURE_TTL_SECONDS: int = 86400
+    JOB_SUMMARY_BUCKET_SECONDS: int = 60
+    JOB_SUMMARY_RETENTION_SECONDS: int = 86400
+    JOB_SWEEPER_ENABLED: bool = True
+    JOB_SWEEP_INTERVAL_SECONDS: float = 300.0
+
+    # In-memory matching of crossing LIMIT orders before routing out;
+    # the book lives in one API process.
+    ORDER_BOOK_ENABLED: bool = False
+    ORDER_BOOK_REST_MS: float = 200.0
+    ORDER_BOOK_SWEEP_INTERVAL_MS: float = 20.0
+
+    # Replay of dead-lettered orders, in batches at a bounded job rate
+    DEAD_LETTER_REPLAY_BATCH_SIZE: int = 500
+    DEAD_LETTER_REPLAY_RATE_PER_SECOND: float = 50.0
+
+    # Opt-in profiling and slow-request capture
+    PROFILING_SECRET: str = os.getenv("PROFILING_SECRET", "")
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_OUTPUT_DIR: str = "profiles"
+    SLOW_REQUEST_THRESHOLD_MS: float = 0.0
+
     class Config:
         case_sensitive = True
 
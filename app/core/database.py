@@ -1,30 +1,239 @@
-from typing import Generator
+import itertools
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Generator, List, Optional
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.declarative import declarative_base
 
 from app.core.config import settings
 from app.utils.common import is_testing
+from app.utils.logger import logger_config
+from app.utils.periodic import PeriodicWorker
 
+logger = logger_config("app.core.database")
 
-engine = create_engine(
-    settings.DATABASE_URI if not is_testing(
-    ) else settings.TEST_DATABASE_URI, echo=True)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+
+def engine_options(uri: str) -> Dict[str, Any]:
+    """Pool options from the settings, for the given database URI."""
+    options: Dict[str, Any] = {
+        "echo": settings.DATABASE_ECHO,
+        "pool_pre_ping": settings.DATABASE_POOL_PRE_PING,
+    }
+    if not uri.startswith("sqlite"):
+        options.update(
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DATABASE_POOL_RECYCLE_SECONDS,
+        )
+    return options
+
+
+def get_engine() -> Engine:
+    """Returns the primary engine, creating it on first use in this
+    process."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                uri = (settings.DATABASE_URI if not is_testing()
+                       else settings.TEST_DATABASE_URI)
+                _engine = create_engine(uri, **engine_options(uri))
+    return _engine
+
+
+class ProcessSession(Session):
+    """Session bound to this process's primary engine unless told
+    otherwise."""
+
+    def __init__(self, bind: Optional[Engine] = None, **kwargs: Any) -> None:
+        super().__init__(bind=bind or get_engine(), **kwargs)
+
+
+SessionLocal = sessionmaker(
+    class_=ProcessSession, autocommit=False, autoflush=False)
 
 Base = declarative_base()
 
+# Whether the replica is streaming from the primary, and its lag: zero
+# while it has replayed everything it received, otherwise the age of the
+# last replayed transaction. A replica that lost its WAL receiver also has
+# nothing left to replay, so the lag alone would call it fresh forever.
+# The receiver status needs pg_read_all_stats; without it only the
+# receiver process being up can be checked.
+POSTGRES_REPLICA_LAG_QUERY = text(
+    "SELECT EXISTS ("
+    "SELECT 1 FROM pg_stat_wal_receiver "
+    "WHERE COALESCE(status, 'streaming') = 'streaming'"
+    "), COALESCE(CASE "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) "
+    "END, 0)"
+)
+
+
+class ReplicaUnavailableError(Exception):
+    """Raised when a replica cannot serve reads that are fresh enough."""
+
+    def __init__(self, detail: str):
+        self.detail = detail
+        super().__init__(self.detail)
+
+
+@dataclass
+class ReplicaState:
+    """Health of one read replica as of the last check."""
+    engine: Engine
+    # Writes committed on the primary before this time are visible.
+    replayed_through: float = 0.0
+    ejected_until: float = 0.0
+
+
+class ReplicaRouter:
+    """Spreads read-only sessions over healthy, fresh-enough replicas."""
+
+    def __init__(
+        self, primary: Optional[Engine], replica_uris: List[str]
+    ) -> None:
+        # None means the process's primary engine, resolved on use.
+        self.primary = primary
+        self.replicas = [
+            ReplicaState(create_engine(uri, **engine_options(uri)))
+            for uri in replica_uris
+        ]
+        self._counter = itertools.count()
+        self._health_checker = PeriodicWorker(
+            "replica-health-check",
+            settings.REPLICA_HEALTH_CHECK_INTERVAL_SECONDS,
+            self.check_health,
+        )
+
+        for replica in self.replicas:
+            event.listen(
+                replica.engine, "handle_error", self._ejector(replica))
+
+    def _ejector(self, replica: ReplicaState):
+        """Builds a listener that ejects the replica on disconnects."""
+        def handle_error(context) -> None:
+            if context.is_disconnect:
+                self.eject(replica, "connection lost")
+        return handle_error
+
+    def start(self) -> None:
+        """Starts checking replica health in the background."""
+        if self.replicas:
+            self._health_checker.start()
+
+    def stop(self) -> None:
+        """Stops the background health checks."""
+        self._health_checker.stop()
+
+    def eject(self, replica: ReplicaState, reason: str) -> None:
+        """Takes a replica out of rotation for a while."""
+        replica.ejected_until = time.time() + settings.REPLICA_EJECT_SECONDS
+        logger.warning(
+            f"Ejected replica {replica.engine.url!r}: {reason}")
+
+    def measure_lag(self, replica: ReplicaState) -> float:
+        """Returns how many seconds the replica is behind the primary."""
+        with replica.engine.connect() as connection:
+            if replica.engine.dialect.name != "postgresql":
+                connection.execute(text("SELECT 1"))
+                return 0.0
+            streaming, lag = connection.execute(
+                POSTGRES_REPLICA_LAG_QUERY).one()
+        if not streaming:
+            raise ReplicaUnavailableError(
+                "WAL receiver is not streaming from the primary")
+        return float(lag)
+
+    def check_health(self) -> None:
+        """Measures every replica, ejecting the unreachable ones.
+
+        A successful check does not readmit an ejected replica early; it
+        stays out until its ejection window has run out.
+        """
+        for replica in self.replicas:
+            checked_at = time.time()
+            try:
+                lag = self.measure_lag(replica)
+            except Exception as e:
+                self.eject(replica, str(e))
+                continue
+            replica.replayed_through = checked_at - lag
+
+    def choose(self, last_write_at: Optional[float] = None) -> Engine:
+        """Picks a replica round-robin, falling back to the primary.
+
+        A replica qualifies when it is not ejected, is within the lag
+        bound and, if the caller wrote at `last_write_at`, has replayed
+        that write.
+        """
+        now = time.time()
+        oldest_allowed = now - settings.REPLICA_MAX_LAG_SECONDS
+        if last_write_at is not None:
+            oldest_allowed = max(oldest_allowed, last_write_at)
+
+        candidates = [
+            replica for replica in self.replicas
+            if replica.ejected_until <= now
+            and replica.replayed_through >= oldest_allowed
+        ]
+        if not candidates:
+            return self.primary or get_engine()
+        return candidates[next(self._counter) % len(candidates)].engine
+
+
+def _replica_uris() -> List[str]:
+    """Reads the configured replica URIs for the current environment."""
+    uris = (settings.DATABASE_REPLICA_URIS if not is_testing()
+            else settings.TEST_DATABASE_REPLICA_URIS)
+    return [uri.strip() for uri in uris.split(",") if uri.strip()]
+
+
+replica_router = ReplicaRouter(None, _replica_uris())
+
+
+def dispose_engines(close: bool = True) -> None:
+    """Drops the pooled connections of the primary and replica engines.
+
+    With `close=False` the connections are forgotten rather than closed,
+    which is what a forked child must do with pools inherited from its
+    parent.
+    """
+    if _engine is not None:
+        _engine.dispose(close=close)
+    for replica in replica_router.replicas:
+        replica.engine.dispose(close=close)
+
+
+def _after_fork_in_child() -> None:
+    """Keeps a forked worker from sharing its parent's connections."""
+    global _engine_lock
+    _engine_lock = threading.Lock()
+    dispose_engines(close=False)
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
 
 def create_db_and_tables() -> None:
     """Creates the tables in the database from the models."""
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
 
 
 def drop_db_and_tables() -> None:
     """Drops the tables in the database, clearing all data."""
-    Base.metadata.drop_all(bind=engine)
+    Base.metadata.drop_all(bind=get_engine())
 
 
 def get_session() -> Generator[Session, None, None]:
@@ -34,3 +243,15 @@ def get_session() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+def get_read_session(
+    last_write_at: Optional[float] = None
+) -> Generator[Session, None, None]:
+    """Generates a read-only session on a replica when one can serve it,
+    otherwise on the primary."""
+    db = SessionLocal(bind=replica_router.choose(last_write_at))
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,285 @@
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.utils.logger import logger_config
+
+logger = logger_config("app.core.embedded_queue")
+
+
+class EmbeddedQueueError(Exception):
+    """Raised when a job cannot be handed to the embedded queue."""
+
+    def __init__(self, detail: str):
+        self.detail = detail
+        super().__init__(self.detail)
+
+
+@dataclass(eq=False)
+class EmbeddedJob:
+    """A function call waiting to run on the embedded worker pool."""
+    func: Callable
+    args: Tuple[Any, ...]
+    # Identifies the job across restarts, e.g. the order id.
+    key: str
+    timeout: float
+    max_retries: int
+    retry_interval: float
+    attempts: int = 0
+    enqueued_at: float = field(default_factory=time.time)
+    # Free-form data for callbacks, like RQ's `job.meta`.
+    meta: Dict[str, Any] = field(default_factory=dict)
+    # Called in a thread with the job and the error after every failure.
+    on_failure: Optional[Callable[["EmbeddedJob", Exception], None]] = None
+
+    @property
+    def should_retry(self) -> bool:
+        """Whether a failed attempt will be retried."""
+        return self.attempts <= self.max_retries
+
+
+class EmbeddedTaskQueue:
+    """In-process replacement for RQ: a bounded asyncio queue drained by
+    a fixed pool of workers that run jobs in threads.
+
+    Failed jobs are retried after `retry_interval` seconds up to
+    `max_retries` times, as RQ's `Retry` does. On stop, jobs that have not
+    run yet are written to a state file so the next start can pick them
+    up again.
+
+    Timeouts differ from RQ, which kills the work horse: a thread cannot
+    be killed, so a job past its timeout keeps its worker until the
+    attempt returns, and its outcome is that attempt's result.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        maxsize: Optional[int] = None,
+        state_file: Optional[str] = None,
+    ) -> None:
+        self.workers = workers or settings.EMBEDDED_WORKERS
+        self.maxsize = maxsize or settings.EMBEDDED_QUEUE_SIZE
+        self.state_file = Path(state_file or settings.EMBEDDED_STATE_FILE)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._in_flight: Set[EmbeddedJob] = set()
+        self._retries: Dict[EmbeddedJob, asyncio.TimerHandle] = {}
+        self._leftovers: List[EmbeddedJob] = []
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        """Whether the worker pool is accepting jobs."""
+        return self._queue is not None and not self._stopping
+
+    @property
+    def depth(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def oldest_job_age(self) -> float:
+        """Seconds the job at the head of the queue has been waiting."""
+        try:
+            # asyncio.Queue keeps its items in a deque; peek at the head.
+            oldest = self._queue._queue[0]
+        except (AttributeError, IndexError, TypeError):
+            return 0.0
+        return max(0.0, time.time() - oldest.enqueued_at)
+
+    async def start(self) -> List[str]:
+        """Starts the workers and returns the keys of jobs left over by
+        the previous shutdown. They stay on disk until `clear_pending`."""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._stopping = False
+        self._worker_tasks = [
+            asyncio.create_task(self._work(), name=f"embedded-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"Embedded queue started with {self.workers} workers.")
+        return self._load_pending()
+
+    async def stop(self, timeout: Optional[float] = None) -> List[str]:
+        """Waits for running jobs, then persists the keys of every job
+        that did not run and returns them."""
+        if self._queue is None:
+            return []
+
+        timeout = (timeout if timeout is not None
+                   else settings.EMBEDDED_SHUTDOWN_TIMEOUT_SECONDS)
+        self._stopping = True
+
+        pending = list(self._retries)
+        for handle in self._retries.values():
+            handle.cancel()
+        self._retries.clear()
+
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+
+        deadline = time.monotonic() + timeout
+        while self._in_flight and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        # Jobs still running past the deadline may finish after we exit;
+        # persisting them risks a duplicate rather than a lost order.
+        pending.extend(self._in_flight)
+        pending.extend(self._leftovers)
+        self._leftovers.clear()
+
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._queue = None
+
+        keys = list(dict.fromkeys(job.key for job in pending))
+        self._save_pending(keys)
+        logger.info(
+            f"Embedded queue stopped, {len(keys)} pending jobs persisted.")
+        return keys
+
+    def enqueue(
+        self,
+        func: Callable,
+        *args: Any,
+        key: str,
+        timeout: float,
+        max_retries: int,
+        retry_interval: float,
+        meta: Optional[Dict[str, Any]] = None,
+        on_failure: Optional[Callable[[EmbeddedJob, Exception], None]] = None,
+        block: bool = False,
+    ) -> EmbeddedJob:
+        """Adds a job from the event loop or from any other thread.
+
+        A full queue raises, unless `block` is set by a caller outside the
+        event loop, which then waits for a worker to make room.
+        """
+        if not self.running:
+            raise EmbeddedQueueError("Embedded queue is not running.")
+
+        job = EmbeddedJob(
+            func=func,
+            args=args,
+            key=key,
+            timeout=timeout,
+            max_retries=max_retries,
+            retry_interval=retry_interval,
+            meta=dict(meta or {}),
+            on_failure=on_failure,
+        )
+
+        try:
+            in_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            in_loop = False
+
+        try:
+            if in_loop:
+                self._queue.put_nowait(job)
+            else:
+                asyncio.run_coroutine_threadsafe(
+                    self._put(job, block), self._loop).result()
+        except asyncio.QueueFull:
+            raise EmbeddedQueueError(
+                f"Embedded queue is full ({self.maxsize} jobs).")
+        return job
+
+    async def _put(self, job: EmbeddedJob, block: bool = False) -> None:
+        """Adds a job, waiting for room in the queue only if `block`."""
+        if block:
+            await self._queue.put(job)
+        else:
+            self._queue.put_nowait(job)
+
+    async def _work(self) -> None:
+        """Runs queued jobs one at a time until cancelled."""
+        while True:
+            job = await self._queue.get()
+            self._in_flight.add(job)
+            try:
+                await self._run(job)
+            finally:
+                self._in_flight.discard(job)
+                if self._queue is not None:
+                    self._queue.task_done()
+
+    async def _run(self, job: EmbeddedJob) -> None:
+        """Runs one attempt of a job in a thread and schedules retries."""
+        job.attempts += 1
+        attempt = asyncio.ensure_future(asyncio.to_thread(job.func, *job.args))
+        try:
+            try:
+                await asyncio.wait_for(
+                    asyncio.shield(attempt), timeout=job.timeout)
+            except asyncio.TimeoutError:
+                # Unlike RQ's work horse, a thread cannot be killed. The
+                # worker waits for it so a retry never overlaps an attempt
+                # that is still talking to the exchange.
+                logger.warning(
+                    f"Job {job.key} exceeded its {job.timeout}s timeout, "
+                    f"waiting for the running attempt to finish.")
+                await attempt
+                logger.warning(f"Job {job.key} finished after its timeout.")
+        except Exception as e:
+            await self._notify_failure(job, e)
+            if not job.should_retry:
+                logger.error(
+                    f"Job {job.key} failed after {job.attempts} attempts: "
+                    f"{str(e)}")
+                return
+
+            logger.warning(
+                f"Job {job.key} failed, retrying in {job.retry_interval}s: "
+                f"{str(e)}")
+            if self._stopping:
+                self._leftovers.append(job)
+            else:
+                self._retries[job] = self._loop.call_later(
+                    job.retry_interval, self._retry, job)
+
+    async def _notify_failure(self, job: EmbeddedJob, error: Exception) -> None:
+        """Runs the job's failure callback without letting it escape."""
+        if job.on_failure is None:
+            return
+        try:
+            await asyncio.to_thread(job.on_failure, job, error)
+        except Exception as e:
+            logger.error(f"Failure callback for job {job.key} failed: {str(e)}")
+
+    def _retry(self, job: EmbeddedJob) -> None:
+        """Puts a job scheduled for retry back on the queue."""
+        self._retries.pop(job, None)
+        if self._stopping or self._queue is None:
+            self._leftovers.append(job)
+            return
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._retries[job] = self._loop.call_later(
+                job.retry_interval, self._retry, job)
+
+    def _save_pending(self, keys: List[str]) -> None:
+        """Writes the keys of jobs that did not run to the state file."""
+        if keys:
+            self.state_file.write_text(json.dumps({"pending": keys}))
+
+    def _load_pending(self) -> List[str]:
+        """Reads the state file left by the last shutdown."""
+        if not self.state_file.exists():
+            return []
+        return json.loads(self.state_file.read_text()).get("pending", [])
+
+    def clear_pending(self) -> None:
+        """Removes the state file once its jobs have been enqueued again,
+        so a failed restore is retried on the next start."""
+        self.state_file.unlink(missing_ok=True)
+
+
+embedded_queue = EmbeddedTaskQueue()
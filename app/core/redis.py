@@ -1,6 +1,71 @@
+import heapq
+import threading
+import time
+from typing import Dict, List, Tuple
+
 import redis
 
 from app.core.config import settings
+from app.utils.profiling import current_profile
+
+
+class InstrumentedRedis(redis.Redis):
+    """Redis client that reports command timings to the active profile."""
+
+    def execute_command(self, *args, **options):
+        profile = current_profile()
+        if profile is None:
+            return super().execute_command(*args, **options)
+
+        started = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            profile.record_redis(str(args[0]), time.perf_counter() - started)
+
+
+class InMemoryDedupeStore:
+    """Process-local stand-in for the expiring Redis keys used to detect
+    duplicate orders in embedded mode."""
+
+    def __init__(self) -> None:
+        self._expires_at: Dict[str, float] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def _purge_expired(self, now: float) -> None:
+        """Drops keys whose time to live has passed."""
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry_heap)
+            if self._expires_at.get(key) == expires_at:
+                del self._expires_at[key]
+
+    def exists(self, *keys: str) -> int:
+        """Counts how many of the keys are set, as Redis EXISTS does."""
+        with self._lock:
+            self._purge_expired(time.monotonic())
+            return sum(1 for key in keys if key in self._expires_at)
+
+    def setex(self, key: str, seconds: int, value: str) -> bool:
+        """Sets a key that expires after `seconds`."""
+        expires_at = time.monotonic() + seconds
+        with self._lock:
+            self._purge_expired(time.monotonic())
+            self._expires_at[key] = expires_at
+            heapq.heappush(self._expiry_heap, (expires_at, key))
+        return True
+
 
+# redis-py pools notice a fork and reconnect in the child, and connect on
+# the first command, so the shared client is safe to create at import.
+redis_client = InstrumentedRedis.from_url(
+    settings.REDIS_URL,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+    socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+    health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL_SECONDS,
+)
 
-redis_client = redis.Redis.from_url(settings.REDIS_URL)
+dedupe_store = (
+    InMemoryDedupeStore() if settings.EXECUTION_MODE == "embedded"
+    else redis_client)
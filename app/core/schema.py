@@ -0,0 +1,106 @@
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import Column, Integer, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+
+from app.core.database import Base, get_engine
+from app.utils.logger import logger_config
+
+logger = logger_config("app.core.schema")
+
+# Bump together with a new entry in MIGRATIONS whenever the models change.
+SCHEMA_VERSION = 2
+# Arbitrary key of the PostgreSQL advisory lock held while migrating.
+SCHEMA_LOCK_KEY = 7_305_021
+# Databases created by create_all before versioning have this table and
+# are at version 1.
+LEGACY_TABLE = "orders"
+
+
+def _add_partial_fills(connection: Connection) -> None:
+    """Version 2: PARTIALLY_FILLED status and orders.filled_quantity."""
+    if connection.dialect.name == "postgresql":
+        connection.execute(text(
+            "ALTER TYPE orderstatus ADD VALUE IF NOT EXISTS "
+            "'PARTIALLY_FILLED'"))
+    # Unversioned databases may already have the column, e.g. when their
+    # tables came from create_db_and_tables() with the current models.
+    columns = {
+        column["name"] for column in inspect(connection).get_columns("orders")}
+    if "filled_quantity" not in columns:
+        connection.execute(text(
+            "ALTER TABLE orders ADD COLUMN filled_quantity "
+            "INTEGER NOT NULL DEFAULT 0"))
+
+
+# Upgrades a database from version `n - 1` to version `n`. A fresh
+# database is created from the models at SCHEMA_VERSION instead.
+MIGRATIONS: Dict[int, Callable[[Connection], None]] = {
+    2: _add_partial_fills,
+}
+
+
+class SchemaVersion(Base):
+    """Single-row table recording which migrations have been applied."""
+
+    __tablename__ = "schema_version"
+
+    id = Column(Integer, primary_key=True, default=1)
+    version = Column(Integer, nullable=False)
+
+
+def read_schema_version(connection: Connection) -> int:
+    """Returns the applied schema version, 0 for an unversioned database."""
+    if not inspect(connection).has_table(SchemaVersion.__tablename__):
+        return 0
+    return connection.scalar(select(SchemaVersion.version)) or 0
+
+
+def ensure_schema(db_engine: Optional[Engine] = None) -> int:
+    """Brings the database up to SCHEMA_VERSION and returns the version.
+
+    The usual case, an up-to-date database, costs a single SELECT. Only
+    when it is behind are the tables created or migrated, under an
+    advisory lock on PostgreSQL so concurrent workers do it once.
+    """
+    db_engine = db_engine or get_engine()
+
+    with db_engine.connect() as connection:
+        try:
+            version = connection.scalar(select(SchemaVersion.version)) or 0
+        except DBAPIError:
+            # No schema_version table yet; checked properly below.
+            version = 0
+    if version >= SCHEMA_VERSION:
+        if version > SCHEMA_VERSION:
+            logger.warning(
+                f"Database schema version {version} is newer than "
+                f"{SCHEMA_VERSION}, the version this code expects.")
+        return version
+
+    with db_engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(
+                text("SELECT pg_advisory_xact_lock(:key)"),
+                {"key": SCHEMA_LOCK_KEY})
+        version = read_schema_version(connection)
+
+        current = version
+        if current == 0:
+            legacy = inspect(connection).has_table(LEGACY_TABLE)
+            # Fills in whatever tables an unversioned database lacks.
+            Base.metadata.create_all(bind=connection)
+            current = 1 if legacy else SCHEMA_VERSION
+            logger.info(f"Database schema initialised at version {current}.")
+
+        for target in range(current + 1, SCHEMA_VERSION + 1):
+            MIGRATIONS[target](connection)
+            logger.info(f"Database schema migrated to version {target}.")
+
+        if version < SCHEMA_VERSION:
+            connection.execute(SchemaVersion.__table__.delete())
+            connection.execute(SchemaVersion.__table__.insert().values(
+                id=1, version=SCHEMA_VERSION))
+
+    return SCHEMA_VERSION
@@ -1,9 +1,19 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
 from app.utils.logger import logger_config
-from app.core.database import create_db_and_tables
+from app.core.config import settings
+from app.core.database import replica_router
+from app.core.schema import ensure_schema
+from app.core.embedded_queue import embedded_queue
+from app.orders.admission import admission_controller
+from app.orders.group_commit import group_commit_writer
+from app.orders.order_book import order_book_engine
+from app.orders.retention import job_sweeper
+from app.orders.tasks import restore_pending_orders
+from app.utils.profiling import ProfilingMiddleware
 
 
 from app.orders import routers
@@ -15,12 +25,37 @@ logger = logger_config(__name__)
 async def lifespan(app: FastAPI):
     """Triggers event before Fast API is started."""
 
-    create_db_and_tables()
+    ensure_schema()
+
+    if settings.ADMISSION_CONTROL_ENABLED:
+        admission_controller.start()
+    replica_router.start()
+    if settings.GROUP_COMMIT_ENABLED:
+        group_commit_writer.start()
+    if settings.EXECUTION_MODE == "embedded":
+        # In a thread, so the workers can drain the queue while it fills.
+        await asyncio.to_thread(
+            restore_pending_orders, await embedded_queue.start())
+        embedded_queue.clear_pending()
+    elif settings.JOB_SWEEPER_ENABLED:
+        job_sweeper.start()
+    if settings.ORDER_BOOK_ENABLED:
+        order_book_engine.start()
 
     logger.info("startup: triggered")
 
     yield
 
+    # Routes resting orders out while the embedded queue still runs. Off
+    # the event loop: the expiry thread may be waiting on the loop to
+    # enqueue, and stopping joins that thread.
+    await asyncio.to_thread(order_book_engine.stop)
+    await embedded_queue.stop()
+    admission_controller.stop()
+    replica_router.stop()
+    group_commit_writer.stop()
+    job_sweeper.stop()
+
     logger.info("shutdown: triggered")
 
 
@@ -32,6 +67,8 @@ def create_application() -> FastAPI:
         lifespan=lifespan,
     )
 
+    application.add_middleware(ProfilingMiddleware)
+
     application.include_router(
         routers.router, prefix="/orders", tags=["Orders"])
 
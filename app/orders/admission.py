@@ -0,0 +1,239 @@
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from redis import Redis
+from rq import Queue
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.database import get_engine
+from app.core.embedded_queue import embedded_queue
+from app.core.redis import redis_client
+from app.orders.exceptions import AdmissionRejectedError
+from app.utils.logger import logger_config
+from app.utils.periodic import PeriodicWorker
+
+logger = logger_config("app.orders.admission")
+
+RATE_LIMIT_KEY_PREFIX = "ratelimit"
+# A snapshot older than this many sample intervals means the sampler is
+# failing; orders are then admitted rather than judged on stale data.
+STALE_SNAPSHOT_INTERVALS = 3
+
+# Refills the bucket from the elapsed Redis server time and takes one token
+# in a single round trip, so concurrent API workers never race on the state.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill = tonumber(ARGV[2])
+local ttl = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * refill)
+local allowed = 0
+local wait_ms = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait_ms = math.ceil((1 - tokens) / refill * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], ttl)
+return {allowed, wait_ms}
+"""
+
+
+@dataclass(frozen=True)
+class AdmissionSnapshot:
+    """Latest sampled health of the queue and the database pool."""
+    queue_depth: int = 0
+    oldest_job_age: float = 0.0
+    pool_saturation: float = 0.0
+    sampled_at: float = 0.0
+
+
+class LocalTokenBuckets:
+    """Process-local token buckets for embedded mode, where there is no
+    Redis to share them through."""
+
+    MAX_BUCKETS = 10000
+
+    def __init__(self) -> None:
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, client_id: str, capacity: int, refill: float) -> float:
+        """Takes a token; returns 0 or the seconds until one is free."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(client_id, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * refill)
+
+            if len(self._buckets) >= self.MAX_BUCKETS:
+                self._buckets.clear()
+
+            if tokens >= 1:
+                self._buckets[client_id] = (tokens - 1, now)
+                return 0.0
+            self._buckets[client_id] = (tokens, now)
+            return (1 - tokens) / refill
+
+
+def pool_saturation(db_engine: Engine) -> float:
+    """Returns the fraction of pooled connections currently checked out."""
+    pool = db_engine.pool
+    if not hasattr(pool, "checkedout") or not hasattr(pool, "size"):
+        return 0.0
+
+    max_overflow = getattr(pool, "_max_overflow", 0)
+    if max_overflow < 0:
+        return 0.0
+
+    capacity = pool.size() + max_overflow
+    if capacity <= 0:
+        return 0.0
+    return pool.checkedout() / capacity
+
+
+class AdmissionController:
+    """Decides whether new orders are accepted, shed or rate limited."""
+
+    def __init__(
+        self, redis: Redis, db_engine: Optional[Engine] = None
+    ) -> None:
+        self.redis = redis
+        # None means the process's primary engine, resolved on use.
+        self.db_engine = db_engine
+        self.queue = Queue(connection=redis)
+        self.snapshot = AdmissionSnapshot()
+        self._rate_limit_script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+        self._local_buckets = LocalTokenBuckets()
+        self._sampler = PeriodicWorker(
+            "admission-sampler",
+            settings.ADMISSION_SAMPLE_INTERVAL_SECONDS,
+            self.sample,
+        )
+
+    def start(self) -> None:
+        """Starts sampling queue and database health in the background."""
+        self._sampler.start()
+
+    def stop(self) -> None:
+        """Stops the background sampler."""
+        self._sampler.stop()
+
+    def sample(self) -> AdmissionSnapshot:
+        """Measures queue depth, oldest job age and pool saturation.
+
+        The pool is measured even when the queue cannot be read; the queue
+        figures are then reported as zero, which admits.
+        """
+        now = time.time()
+        saturation = pool_saturation(self.db_engine or get_engine())
+        if settings.EXECUTION_MODE == "embedded":
+            queue_depth = embedded_queue.depth
+            oldest_job_age = embedded_queue.oldest_job_age()
+        else:
+            try:
+                queue_depth, oldest_job_age = self._sample_rq_queue(now)
+            except Exception as e:
+                logger.warning(
+                    f"Could not sample the order queue: {str(e)}")
+                queue_depth, oldest_job_age = 0, 0.0
+
+        self.snapshot = AdmissionSnapshot(
+            queue_depth=queue_depth,
+            oldest_job_age=oldest_job_age,
+            pool_saturation=saturation,
+            sampled_at=now,
+        )
+        return self.snapshot
+
+    def _sample_rq_queue(self, now: float) -> Tuple[int, float]:
+        """Reads the RQ queue length and the age of its oldest job."""
+        queue_depth = self.queue.count
+        if not queue_depth:
+            return 0, 0.0
+
+        job_ids = self.queue.get_job_ids(0, 1)
+        job = self.queue.fetch_job(job_ids[0]) if job_ids else None
+        if job is None or job.enqueued_at is None:
+            return queue_depth, 0.0
+        return queue_depth, max(0.0, now - job.enqueued_at.timestamp())
+
+    def check_load(self) -> None:
+        """Raises when the last sample is past any shedding threshold."""
+        snapshot = self.snapshot
+        retry_after = settings.ADMISSION_RETRY_AFTER_SECONDS
+
+        max_age = (STALE_SNAPSHOT_INTERVALS
+                   * settings.ADMISSION_SAMPLE_INTERVAL_SECONDS)
+        if time.time() - snapshot.sampled_at > max_age:
+            return
+
+        if snapshot.queue_depth >= settings.ADMISSION_MAX_QUEUE_DEPTH:
+            raise AdmissionRejectedError(
+                f"Order queue is full ({snapshot.queue_depth} jobs waiting). "
+                "Please retry later.",
+                status_code=503,
+                retry_after=retry_after,
+            )
+
+        if snapshot.oldest_job_age >= settings.ADMISSION_MAX_JOB_AGE_SECONDS:
+            raise AdmissionRejectedError(
+                "Order processing is delayed by "
+                f"{int(snapshot.oldest_job_age)} seconds. Please retry later.",
+                status_code=503,
+                retry_after=retry_after,
+            )
+
+        if snapshot.pool_saturation >= settings.ADMISSION_MAX_POOL_SATURATION:
+            raise AdmissionRejectedError(
+                "Database is saturated. Please retry later.",
+                status_code=503,
+                retry_after=retry_after,
+            )
+
+    def check_rate_limit(self, client_id: str) -> None:
+        """Takes a token from the client's bucket or raises when empty."""
+        capacity = settings.RATE_LIMIT_CAPACITY
+        refill = settings.RATE_LIMIT_REFILL_PER_SECOND
+
+        if settings.EXECUTION_MODE == "embedded":
+            wait = self._local_buckets.take(client_id, capacity, refill)
+            allowed, wait_ms = wait == 0, wait * 1000
+        else:
+            allowed, wait_ms = self._redis_token_bucket(
+                client_id, capacity, refill)
+
+        if not int(allowed):
+            raise AdmissionRejectedError(
+                "Rate limit exceeded. Please slow down.",
+                status_code=429,
+                retry_after=max(1, math.ceil(int(wait_ms) / 1000)),
+            )
+
+    def _redis_token_bucket(
+        self, client_id: str, capacity: int, refill: float
+    ) -> Tuple[int, int]:
+        """Runs the shared token bucket script; admits if Redis is down."""
+        ttl = math.ceil(capacity / refill) + 1
+        try:
+            allowed, wait_ms = self._rate_limit_script(
+                keys=[f"{RATE_LIMIT_KEY_PREFIX}:{client_id}"],
+                args=[capacity, refill, ttl],
+            )
+        except Exception as e:
+            logger.warning(
+                f"Rate limiter unavailable, admitting {client_id}: {str(e)}")
+            return 1, 0
+        return allowed, wait_ms
+
+
+admission_controller = AdmissionController(redis_client)
@@ -0,0 +1,311 @@
+import argparse
+import csv
+import io
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+
+from app.core.database import get_engine
+from app.orders.models import Order, OrderSide, OrderStatus, OrderType
+from app.orders.schemas import (
+    LIMIT_PRICE_POSITIVE_ERROR,
+    LIMIT_PRICE_REQUIRED_ERROR,
+    MARKET_LIMIT_PRICE_ERROR,
+)
+from app.orders.tasks import enqueue_order_batch
+from app.utils.logger import logger_config
+
+logger = logger_config("app.orders.bulk_import")
+
+ORDER_COLUMNS = ["type", "side", "instrument", "limit_price", "quantity"]
+COPY_COLUMNS = [
+    "id", "type", "side", "instrument", "limit_price", "quantity",
+    "status", "created_at", "updated_at",
+]
+REJECT_COLUMNS = ["row_number", *ORDER_COLUMNS, "reason"]
+
+DEFAULT_CHUNK_SIZE = 100_000
+DEFAULT_ENQUEUE_BATCH_SIZE = 1_000
+# Approximate CSV row width, used to turn a row budget into a block size.
+CSV_ROW_BYTES = 64
+
+INSTRUMENT_LENGTH = 12
+# Bounded by the Integer and Numeric(10, 2) columns of the orders table.
+MAX_QUANTITY = 2 ** 31 - 1
+QUANTITY_PATTERN = r"^\d{1,10}$"
+PRICE_PATTERN = r"^-?\d{1,8}(\.\d{1,2})?$"
+
+ORDER_TYPE_VALUES = pa.array([member.value for member in OrderType])
+ORDER_SIDE_VALUES = pa.array([member.value for member in OrderSide])
+
+
+@dataclass
+class ImportReport:
+    """Counts of rows seen, imported, rejected and enqueued."""
+    total: int = 0
+    imported: int = 0
+    rejected: int = 0
+    enqueued: int = 0
+
+
+def read_order_chunks(
+    path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[pa.RecordBatch]:
+    """Streams a CSV or Parquet file as record batches of string columns."""
+    if path.suffix.lower() == ".parquet":
+        batches = pq.ParquetFile(path).iter_batches(
+            batch_size=chunk_size, columns=ORDER_COLUMNS)
+    else:
+        batches = pa_csv.open_csv(
+            path,
+            read_options=pa_csv.ReadOptions(
+                block_size=chunk_size * CSV_ROW_BYTES),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={name: pa.string() for name in ORDER_COLUMNS},
+                include_columns=ORDER_COLUMNS,
+                include_missing_columns=True,
+                strings_can_be_null=True,
+            ),
+        )
+
+    for batch in batches:
+        yield pa.RecordBatch.from_arrays(
+            [pc.cast(batch.column(name), pa.string())
+             for name in ORDER_COLUMNS],
+            names=ORDER_COLUMNS,
+        )
+
+
+def _mask(values: pa.Array) -> np.ndarray:
+    """Converts an Arrow boolean array into a NumPy mask, nulls as False."""
+    return pc.fill_null(values, False).to_numpy(zero_copy_only=False)
+
+
+def validate_chunk(
+    batch: pa.RecordBatch
+) -> Tuple[np.ndarray, List[Tuple[np.ndarray, str]]]:
+    """Applies the `CreateOrderSchema` rules to whole columns at once.
+
+    Returns the mask of valid rows and the failed checks as
+    `(mask, reason)` pairs.
+    """
+    order_type = batch.column("type")
+    side = batch.column("side")
+    instrument = batch.column("instrument")
+    limit_price = batch.column("limit_price")
+    quantity = batch.column("quantity")
+
+    is_limit = _mask(pc.equal(order_type, OrderType.LIMIT.value))
+    is_market = _mask(pc.equal(order_type, OrderType.MARKET.value))
+    has_price = _mask(pc.is_valid(limit_price))
+
+    price_is_number = _mask(pc.match_substring_regex(
+        limit_price, PRICE_PATTERN))
+    price = pc.cast(
+        pc.if_else(pa.array(price_is_number), limit_price, "0"),
+        pa.float64(),
+    ).to_numpy(zero_copy_only=False)
+
+    quantity_is_number = _mask(pc.match_substring_regex(
+        quantity, QUANTITY_PATTERN))
+    quantity_value = pc.cast(
+        pc.if_else(pa.array(quantity_is_number), quantity, "0"),
+        pa.int64(),
+    ).to_numpy(zero_copy_only=False)
+
+    checks = [
+        (~_mask(pc.is_in(order_type, value_set=ORDER_TYPE_VALUES)),
+         "Input should be 'market' or 'limit'"),
+        (~_mask(pc.is_in(side, value_set=ORDER_SIDE_VALUES)),
+         "Input should be 'buy' or 'sell'"),
+        (~_mask(pc.equal(pc.utf8_length(instrument), INSTRUMENT_LENGTH)),
+         f"`instrument` should have exactly {INSTRUMENT_LENGTH} characters"),
+        (~quantity_is_number | (quantity_value <= 0),
+         "`quantity` should be an integer greater than 0"),
+        (quantity_value > MAX_QUANTITY,
+         f"`quantity` should be at most {MAX_QUANTITY}"),
+        (has_price & ~price_is_number,
+         "`limit_price` should be a number with at most 8 digits "
+         "and 2 decimal places"),
+        (is_market & has_price, MARKET_LIMIT_PRICE_ERROR),
+        (is_limit & ~has_price, LIMIT_PRICE_REQUIRED_ERROR),
+        (is_limit & price_is_number & (price <= 0),
+         LIMIT_PRICE_POSITIVE_ERROR),
+    ]
+
+    invalid = np.zeros(batch.num_rows, dtype=bool)
+    for mask, _ in checks:
+        invalid |= mask
+
+    return ~invalid, [(mask, reason) for mask, reason in checks if mask.any()]
+
+
+def write_rejects(
+    writer: Any,
+    batch: pa.RecordBatch,
+    first_row: int,
+    failed_checks: List[Tuple[np.ndarray, str]],
+) -> int:
+    """Writes rejected rows with every reason they failed; returns count."""
+    reasons = {}
+    for mask, reason in failed_checks:
+        for index in np.flatnonzero(mask):
+            reasons.setdefault(int(index), []).append(reason)
+
+    columns = [batch.column(name) for name in ORDER_COLUMNS]
+    for index in sorted(reasons):
+        writer.writerow([
+            first_row + index,
+            *(column[index].as_py() for column in columns),
+            "; ".join(reasons[index]),
+        ])
+    return len(reasons)
+
+
+def build_order_rows(batch: pa.RecordBatch) -> pa.Table:
+    """Builds the `orders` rows for valid input, ready for COPY."""
+    num_rows = batch.num_rows
+    now = pa.scalar(datetime.now(), pa.timestamp("us"))
+
+    return pa.table({
+        "id": pa.array([str(uuid.uuid4()) for _ in range(num_rows)]),
+        # The Enum columns store member names, e.g. LIMIT and BUY.
+        "type": pc.utf8_upper(batch.column("type")),
+        "side": pc.utf8_upper(batch.column("side")),
+        "instrument": batch.column("instrument"),
+        "limit_price": pc.cast(
+            batch.column("limit_price"), pa.decimal128(10, 2)),
+        "quantity": pc.cast(batch.column("quantity"), pa.int64()),
+        "status": pa.repeat(OrderStatus.PENDING.name, num_rows),
+        "created_at": pa.repeat(now, num_rows),
+        "updated_at": pa.repeat(now, num_rows),
+    })
+
+
+def copy_order_rows(db_engine: Engine, rows: pa.Table) -> None:
+    """Streams rows into the orders table, using COPY on PostgreSQL."""
+    if db_engine.dialect.name != "postgresql":
+        records = rows.to_pylist()
+        for record in records:
+            record["type"] = OrderType[record["type"]]
+            record["side"] = OrderSide[record["side"]]
+            record["status"] = OrderStatus[record["status"]]
+            record["id"] = uuid.UUID(record["id"])
+        with db_engine.begin() as connection:
+            connection.execute(insert(Order), records)
+        return
+
+    buffer = io.BytesIO()
+    pa_csv.write_csv(
+        rows,
+        buffer,
+        write_options=pa_csv.WriteOptions(
+            include_header=False, quoting_style="needed"),
+    )
+    buffer.seek(0)
+
+    connection = db_engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {Order.__tablename__} ({', '.join(COPY_COLUMNS)}) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+def import_orders(
+    path: Path,
+    errors_path: Path,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    enqueue: bool = False,
+    enqueue_batch_size: int = DEFAULT_ENQUEUE_BATCH_SIZE,
+    db_engine: Optional[Engine] = None,
+) -> ImportReport:
+    """Validates and loads orders from a file, chunk by chunk."""
+    db_engine = db_engine or get_engine()
+    report = ImportReport()
+
+    with open(errors_path, "w", newline="") as errors_file:
+        writer = csv.writer(errors_file)
+        writer.writerow(REJECT_COLUMNS)
+
+        for batch in read_order_chunks(path, chunk_size):
+            valid, failed_checks = validate_chunk(batch)
+            # Data rows are numbered from 1, as a spreadsheet would show.
+            report.rejected += write_rejects(
+                writer, batch, report.total + 1, failed_checks)
+            report.total += batch.num_rows
+
+            valid_rows = batch.filter(pa.array(valid))
+            if valid_rows.num_rows == 0:
+                continue
+
+            rows = build_order_rows(valid_rows)
+            copy_order_rows(db_engine, rows)
+            report.imported += rows.num_rows
+
+            if enqueue:
+                order_ids = rows.column("id").to_pylist()
+                for start in range(0, len(order_ids), enqueue_batch_size):
+                    report.enqueued += len(enqueue_order_batch(
+                        order_ids[start:start + enqueue_batch_size]))
+
+            logger.info(
+                f"Imported {report.imported} of {report.total} orders, "
+                f"{report.rejected} rejected.")
+
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point for bulk order imports."""
+    parser = argparse.ArgumentParser(
+        description="Bulk import orders from a CSV or Parquet file.")
+    parser.add_argument("path", type=Path, help="CSV or Parquet file.")
+    parser.add_argument(
+        "--errors", type=Path, default=None,
+        help="File for rejected rows (default: <path>.rejects.csv).")
+    parser.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+        help="Rows validated and copied per chunk.")
+    parser.add_argument(
+        "--enqueue", action="store_true",
+        help="Enqueue processing for every imported order.")
+    parser.add_argument(
+        "--enqueue-batch-size", type=int, default=DEFAULT_ENQUEUE_BATCH_SIZE,
+        help="Jobs enqueued per Redis round trip.")
+    args = parser.parse_args(argv)
+
+    errors_path = args.errors or args.path.with_suffix(".rejects.csv")
+    report = import_orders(
+        args.path,
+        errors_path,
+        chunk_size=args.chunk_size,
+        enqueue=args.enqueue,
+        enqueue_batch_size=args.enqueue_batch_size,
+    )
+    logger.info(
+        f"Import finished: {report.imported} imported, "
+        f"{report.rejected} rejected (see {errors_path}), "
+        f"{report.enqueued} enqueued.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import argparse
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import get_session
+from app.orders.exceptions import DatabaseServiceError, RedisTaskQueueError
+from app.orders.models import DeadLetter, Order
+from app.orders.schemas import DeadLetterSchema
+from app.orders.tasks import enqueue_order_batch, reprocessed_status
+from app.utils.logger import logger_config
+
+logger = logger_config("app.orders.dead_letters")
+
+
+def dead_letter_filters(
+    error_class: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> List[Any]:
+    """Builds the WHERE clauses for an error class and time window."""
+    filters = []
+    if error_class:
+        filters.append(DeadLetter.error_class == error_class)
+    if since is not None:
+        filters.append(DeadLetter.failed_at >= since)
+    if until is not None:
+        filters.append(DeadLetter.failed_at < until)
+    return filters
+
+
+def list_dead_letters(
+    db: Session,
+    error_class: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = 10,
+    skip: int = 0,
+) -> dict:
+    """List dead-lettered orders, oldest failure first, with pagination."""
+    filters = dead_letter_filters(error_class, since, until)
+    try:
+        total = db.scalar(
+            select(func.count()).select_from(DeadLetter).where(*filters))
+        dead_letters = db.scalars(
+            select(DeadLetter)
+            .where(*filters)
+            .order_by(DeadLetter.failed_at, DeadLetter.order_id)
+            .offset(skip)
+            .limit(limit)
+        ).all()
+        return {
+            "total": total,
+            "dead_letters": [
+                DeadLetterSchema.model_validate(dead_letter)
+                for dead_letter in dead_letters
+            ],
+            "limit": limit,
+            "skip": skip,
+        }
+    except Exception as e:
+        error_message = (
+            f"Error occurred while retrieving dead letters: {str(e)}")
+        logger.error(error_message)
+        raise DatabaseServiceError(detail=error_message)
+
+
+def count_dead_letters(
+    db: Session,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Dict[str, int]:
+    """Counts dead-lettered orders per error class."""
+    filters = dead_letter_filters(since=since, until=until)
+    try:
+        rows = db.execute(
+            select(DeadLetter.error_class, func.count())
+            .where(*filters)
+            .group_by(DeadLetter.error_class)
+            .order_by(func.count().desc())
+        ).all()
+        return {error_class: count for error_class, count in rows}
+    except Exception as e:
+        error_message = (
+            f"Error occurred while counting dead letters: {str(e)}")
+        logger.error(error_message)
+        raise DatabaseServiceError(detail=error_message)
+
+
+def replay_dead_letters(
+    error_class: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+    rate: Optional[float] = None,
+    limit: Optional[int] = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> int:
+    """Re-enqueues dead-lettered orders in throttled batches.
+
+    Each batch resets its orders to PENDING (PARTIALLY_FILLED if partly
+    filled) with one UPDATE, removes their dead letters and enqueues them
+    in one Redis round trip. Batches are spaced so that no more than
+    `rate` jobs per second reach the queue.
+    Returns the number of orders replayed.
+
+    Replay always goes through RQ. In embedded mode the jobs would never
+    run, as the queue lives inside the API process, so it is refused.
+    """
+    if settings.EXECUTION_MODE == "embedded":
+        raise RedisTaskQueueError(
+            "Dead letter replay needs Redis and an RQ worker; it is not "
+            "available with EXECUTION_MODE=embedded.")
+
+    batch_size = batch_size or settings.DEAD_LETTER_REPLAY_BATCH_SIZE
+    rate = rate or settings.DEAD_LETTER_REPLAY_RATE_PER_SECOND
+    filters = dead_letter_filters(error_class, since, until)
+
+    replayed = 0
+    while limit is None or replayed < limit:
+        started = time.monotonic()
+        size = batch_size if limit is None else min(
+            batch_size, limit - replayed)
+
+        db = next(get_session())
+        try:
+            order_ids = db.scalars(
+                select(DeadLetter.order_id)
+                .where(*filters)
+                .order_by(DeadLetter.failed_at, DeadLetter.order_id)
+                .limit(size)
+            ).all()
+            if not order_ids:
+                break
+
+            db.execute(
+                update(Order)
+                .where(Order.id.in_(order_ids))
+                .values(status=reprocessed_status())
+            )
+            db.execute(
+                delete(DeadLetter).where(DeadLetter.order_id.in_(order_ids)))
+            # Enqueued before the commit, so a Redis failure leaves the
+            # dead letters in place for the next replay.
+            enqueue_order_batch(order_ids)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        replayed += len(order_ids)
+        logger.info(f"Replayed {len(order_ids)} dead-lettered orders.")
+        sleep(max(0.0, len(order_ids) / rate - (time.monotonic() - started)))
+
+    logger.info(f"Replay finished: {replayed} orders re-enqueued.")
+    return replayed
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point for inspecting and replaying dead letters."""
+    parser = argparse.ArgumentParser(
+        description="Inspect and replay dead-lettered orders.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    filters = argparse.ArgumentParser(add_help=False)
+    filters.add_argument(
+        "--error-class", default=None, help="Only this error class.")
+    filters.add_argument(
+        "--since", type=datetime.fromisoformat, default=None,
+        help="Only failures at or after this ISO time.")
+    filters.add_argument(
+        "--until", type=datetime.fromisoformat, default=None,
+        help="Only failures before this ISO time.")
+
+    list_command = commands.add_parser(
+        "list", parents=[filters], help="List dead-lettered orders.")
+    list_command.add_argument("--limit", type=int, default=100)
+    list_command.add_argument("--skip", type=int, default=0)
+
+    commands.add_parser(
+        "stats", parents=[filters], help="Count dead letters per error class.")
+
+    replay_command = commands.add_parser(
+        "replay", parents=[filters], help="Re-enqueue dead-lettered orders.")
+    replay_command.add_argument(
+        "--batch-size", type=int, default=None,
+        help="Orders reset and enqueued per batch.")
+    replay_command.add_argument(
+        "--rate", type=float, default=None,
+        help="Maximum jobs enqueued per second.")
+    replay_command.add_argument(
+        "--limit", type=int, default=None,
+        help="Maximum number of orders to replay.")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "replay":
+        replay_dead_letters(
+            error_class=args.error_class,
+            since=args.since,
+            until=args.until,
+            batch_size=args.batch_size,
+            rate=args.rate,
+            limit=args.limit,
+        )
+        return
+
+    db = next(get_session())
+    try:
+        if args.command == "stats":
+            for error_class, count in count_dead_letters(
+                    db, args.since, args.until).items():
+                print(f"{count:>8}  {error_class}")
+            return
+
+        result = list_dead_letters(
+            db, args.error_class, args.since, args.until,
+            limit=args.limit, skip=args.skip)
+        for dead_letter in result["dead_letters"]:
+            print(
+                f"{dead_letter.order_id}  "
+                f"{dead_letter.failed_at.isoformat(timespec='seconds')}  "
+                f"{dead_letter.error_class}  "
+                f"attempts={dead_letter.attempts}  {dead_letter.error_message}")
+        print(f"{len(result['dead_letters'])} of {result['total']} shown.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
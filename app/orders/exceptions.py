@@ -20,3 +20,13 @@ class RedisTaskQueueError(Exception):
     def __init__(self, detail: str):
         self.detail = detail
         super().__init__(self.detail)
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when admission control sheds an incoming order."""
+
+    def __init__(self, detail: str, status_code: int, retry_after: int):
+        self.detail = detail
+        self.status_code = status_code
+        self.retry_after = retry_after
+        super().__init__(self.detail)
@@ -0,0 +1,156 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.orders.exceptions import DatabaseServiceError
+from app.orders.models import Order
+from app.orders.schemas import CreateOrderSchema, OrderResponseSchema
+from app.utils.logger import logger_config
+
+logger = logger_config("app.orders.group_commit")
+
+_STOP = object()
+
+
+@dataclass
+class PendingInsert:
+    """An order waiting for the next group commit."""
+    order_data: CreateOrderSchema
+    future: Future = field(default_factory=Future)
+
+
+class GroupCommitWriter:
+    """Coalesces concurrent order inserts into shared transactions.
+
+    Callers submit orders from any thread. A single writer thread collects
+    them for up to `window_ms` or `max_batch` orders, writes them with one
+    multi-row INSERT ... RETURNING, commits once and resolves every caller
+    with its persisted order.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        window_ms: Optional[float] = None,
+        max_batch: Optional[int] = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.window = (
+            window_ms if window_ms is not None
+            else settings.GROUP_COMMIT_WINDOW_MS) / 1000
+        self.max_batch = max_batch or settings.GROUP_COMMIT_MAX_BATCH
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Starts the writer thread if it is not already running."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="group-commit-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Flushes queued orders and stops the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def submit(self, order_data: CreateOrderSchema) -> Future:
+        """Queues an order; the future resolves once it is committed."""
+        self.start()
+        pending = PendingInsert(order_data)
+        self._queue.put(pending)
+        return pending.future
+
+    def _run(self) -> None:
+        """Collects and flushes batches until asked to stop."""
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+
+            batch = [first]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self.flush(batch)
+
+    def flush(self, batch: List[PendingInsert]) -> None:
+        """Writes a batch in one transaction and resolves its callers."""
+        # Callers that gave up waiting have cancelled their futures; the
+        # rest can no longer be cancelled once marked running.
+        batch = [
+            pending for pending in batch
+            if pending.future.set_running_or_notify_cancel()
+        ]
+        if not batch:
+            return
+
+        db = None
+        try:
+            # Every step after the futures were marked running is covered,
+            # so no caller is left waiting if any of them fails.
+            rows = [
+                {
+                    "type": pending.order_data.type,
+                    "side": pending.order_data.side,
+                    "instrument": pending.order_data.instrument,
+                    "limit_price": pending.order_data.limit_price,
+                    "quantity": pending.order_data.quantity,
+                }
+                for pending in batch
+            ]
+            db = self.session_factory()
+            orders = db.scalars(
+                insert(Order).returning(Order, sort_by_parameter_order=True),
+                rows,
+            ).all()
+            # Built before the commit expires the freshly returned rows.
+            responses = [
+                OrderResponseSchema.model_validate(order) for order in orders]
+            db.commit()
+        except Exception as e:
+            if db is not None:
+                db.rollback()
+            error_message = (
+                f"Database error occurred while committing "
+                f"{len(batch)} orders: {str(e)}")
+            logger.error(error_message)
+            for pending in batch:
+                pending.future.set_exception(
+                    DatabaseServiceError(detail=error_message))
+            return
+        finally:
+            if db is not None:
+                db.close()
+
+        logger.info(f"Group commit of {len(batch)} orders.")
+        for pending, response in zip(batch, responses):
+            pending.future.set_result(response)
+
+
+group_commit_writer = GroupCommitWriter()
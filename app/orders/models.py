@@ -1,7 +1,8 @@
 import enum
 import uuid
 
-from sqlalchemy import Column, String, Integer, Enum, Numeric, DateTime
+from sqlalchemy import (
+    Column, String, Integer, Enum, Numeric, DateTime, ForeignKey, Text, text)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 
@@ -21,10 +22,15 @@ class OrderType(enum.Enum):
 
 
 class OrderStatus(enum.Enum):
-    """Describes the current state of the order: pending, completed, or failed."""
+    """Describes the current state of the order: pending, completed, or failed.
+
+    PARTIALLY_FILLED orders were matched in part by the internal order book.
+    New members go last, since snapshots encode statuses by position.
+    """
     PENDING = "pending"
     COMPLETED = "completed"
     FAILED = "failed"
+    PARTIALLY_FILLED = "partially_filled"
 
 
 class Order(Base):
@@ -39,6 +45,24 @@ class Order(Base):
     instrument = Column(String(12))
     limit_price = Column(Numeric(precision=10, scale=2))
     quantity = Column(Integer)
+    # Quantity matched so far, internally or at the exchange.
+    filled_quantity = Column(
+        Integer, nullable=False, default=0, server_default=text("0"))
     status = Column(Enum(OrderStatus), default=OrderStatus.PENDING)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
+class DeadLetter(Base):
+    """An order whose processing failed on every attempt."""
+
+    __tablename__ = "dead_letters"
+
+    order_id = Column(UUID(as_uuid=True), ForeignKey("orders.id"),
+                      primary_key=True)
+    error_class = Column(String(100), index=True)
+    error_message = Column(String(500))
+    attempts = Column(Integer)
+    # JSON list of [unix time, error class] pairs, one per attempt.
+    history = Column(Text)
+    failed_at = Column(DateTime, default=func.now(), index=True)
@@ -0,0 +1,373 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from decimal import Decimal
+from typing import (
+    Callable, Deque, Dict, List, NamedTuple, Optional, Tuple)
+from uuid import UUID
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.orders.exceptions import DatabaseServiceError
+from app.orders.models import Order, OrderSide, OrderStatus
+from app.orders.schemas import OrderResponseSchema
+from app.orders.tasks import enqueue_order_processing
+from app.utils.logger import logger_config
+from app.utils.periodic import PeriodicWorker
+
+logger = logger_config("app.orders.order_book")
+
+# Prices are kept as integer cents, matching Numeric(10, 2).
+PRICE_SCALE = 100
+# A side's heap is rebuilt once this share of its entries is stale.
+STALE_FRACTION = 0.5
+
+
+def to_ticks(price: Decimal) -> int:
+    """Converts a limit price into integer cents."""
+    return int((price * PRICE_SCALE).to_integral_value())
+
+
+class RestingOrder:
+    """Book entry of a LIMIT order; slots keep large books compact."""
+
+    __slots__ = (
+        "order_id", "side", "price", "quantity", "filled", "expires_at",
+        "active", "sequence")
+
+    def __init__(
+        self,
+        order_id: UUID,
+        side: OrderSide,
+        price: int,
+        quantity: int,
+        expires_at: float,
+    ) -> None:
+        self.order_id = order_id
+        self.side = side
+        self.price = price
+        self.quantity = quantity
+        self.filled = 0
+        self.expires_at = expires_at
+        self.active = True
+        # Arrival number, set when the order rests.
+        self.sequence = -1
+
+    @property
+    def remaining(self) -> int:
+        """Quantity still open."""
+        return self.quantity - self.filled
+
+    @property
+    def status(self) -> OrderStatus:
+        """Order status implied by the fills so far."""
+        if self.filled >= self.quantity:
+            return OrderStatus.COMPLETED
+        if self.filled:
+            return OrderStatus.PARTIALLY_FILLED
+        return OrderStatus.PENDING
+
+
+class Fill(NamedTuple):
+    """Quantity traded between a resting and an incoming order."""
+    maker: RestingOrder
+    taker_id: UUID
+    price: int
+    quantity: int
+
+
+class OrderBook:
+    """Bids and asks of one instrument with price-time priority.
+
+    Each side is a binary heap of (key, sequence, order) tuples, where the
+    key is the price for asks and the negated price for bids, so the best
+    price and then the earliest arrival is always at the top. Removed
+    orders are marked inactive and skipped when they surface; a side is
+    rebuilt once STALE_FRACTION of its entries are inactive, so entries
+    stuck below a long-lived best price do not pile up.
+    """
+
+    def __init__(self, instrument: str) -> None:
+        self.instrument = instrument
+        self._bids: List[Tuple[int, int, RestingOrder]] = []
+        self._asks: List[Tuple[int, int, RestingOrder]] = []
+        self._heaps = {OrderSide.BUY: self._bids, OrderSide.SELL: self._asks}
+        # Inactive entries still in each side's heap.
+        self._stale = {OrderSide.BUY: 0, OrderSide.SELL: 0}
+        self._orders: Dict[UUID, RestingOrder] = {}
+        # Resting orders by arrival; with a fixed rest window this is
+        # also their expiry order.
+        self._arrivals: Deque[RestingOrder] = deque()
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def _best(self, side: OrderSide):
+        """Returns the top entry of a side, dropping inactive ones."""
+        heap = self._heaps[side]
+        while heap and not heap[0][2].active:
+            heapq.heappop(heap)
+            self._stale[side] -= 1
+        return heap[0] if heap else None
+
+    def _rest(self, order: RestingOrder) -> None:
+        """Puts an order on its side of the book."""
+        key = -order.price if order.side == OrderSide.BUY else order.price
+        heapq.heappush(self._heaps[order.side], (key, order.sequence, order))
+        self._orders[order.order_id] = order
+
+    def _compact(self, side: OrderSide) -> None:
+        """Rebuilds a side from its active entries once too many are stale."""
+        heap = self._heaps[side]
+        if self._stale[side] <= len(heap) * STALE_FRACTION:
+            return
+        # In place, as the heap lists are shared with _bids and _asks.
+        heap[:] = [entry for entry in heap if entry[2].active]
+        heapq.heapify(heap)
+        self._stale[side] = 0
+
+    def best_bid(self) -> Optional[int]:
+        """Highest resting bid price, if any."""
+        best = self._best(OrderSide.BUY)
+        return -best[0] if best else None
+
+    def best_ask(self) -> Optional[int]:
+        """Lowest resting ask price, if any."""
+        best = self._best(OrderSide.SELL)
+        return best[0] if best else None
+
+    def submit(
+        self,
+        order_id: UUID,
+        side: OrderSide,
+        price: int,
+        quantity: int,
+        expires_at: float = float("inf"),
+    ) -> Tuple[RestingOrder, List[Fill]]:
+        """Matches an incoming LIMIT order and rests what is left.
+
+        Trades happen at the resting order's price. Returns the incoming
+        order's entry and the fills, best price and oldest order first.
+        """
+        taker = RestingOrder(order_id, side, price, quantity, expires_at)
+        if side == OrderSide.BUY:
+            # Asks at or below the bid cross.
+            opposite, limit = OrderSide.SELL, price
+        else:
+            # Bids at or above the ask cross; their keys are negated.
+            opposite, limit = OrderSide.BUY, -price
+
+        fills = []
+        while taker.filled < quantity:
+            best = self._best(opposite)
+            if best is None or best[0] > limit:
+                break
+            maker = best[2]
+            traded = min(quantity - taker.filled, maker.remaining)
+            maker.filled += traded
+            taker.filled += traded
+            fills.append(Fill(maker, order_id, maker.price, traded))
+            if maker.filled >= maker.quantity:
+                maker.active = False
+                heapq.heappop(self._heaps[opposite])
+                del self._orders[maker.order_id]
+
+        if taker.filled < quantity:
+            taker.sequence = next(self._sequence)
+            self._rest(taker)
+            self._arrivals.append(taker)
+        else:
+            taker.active = False
+        return taker, fills
+
+    def revert(self, taker: RestingOrder, fills: List[Fill]) -> None:
+        """Undoes a submit, e.g. when its fills could not be recorded.
+
+        Makers get their quantity back and keep their place in the queue;
+        the incoming order is taken off the book.
+        """
+        self.cancel(taker.order_id)
+        for fill in reversed(fills):
+            maker = fill.maker
+            maker.filled -= fill.quantity
+            if not maker.active:
+                maker.active = True
+                self._rest(maker)
+
+    def cancel(self, order_id: UUID) -> Optional[RestingOrder]:
+        """Takes an order off the book and returns it, if it was resting."""
+        order = self._orders.pop(order_id, None)
+        if order is not None:
+            order.active = False
+            self._stale[order.side] += 1
+            self._compact(order.side)
+        return order
+
+    def expire(self, now: float) -> List[RestingOrder]:
+        """Takes every order whose rest window has ended off the book."""
+        expired = []
+        while self._arrivals and self._arrivals[0].expires_at <= now:
+            order = self._arrivals.popleft()
+            if order.active:
+                self.cancel(order.order_id)
+                expired.append(order)
+        return expired
+
+    def drain(self) -> List[RestingOrder]:
+        """Takes every resting order off the book."""
+        return self.expire(float("inf"))
+
+
+class OrderBookEngine:
+    """Matches crossing LIMIT orders in memory before routing them out.
+
+    An incoming LIMIT order first trades against the instrument's book.
+    Whatever is left rests for `rest_ms` so that later orders can cross
+    it; after that its unfilled quantity is routed to the exchange like
+    any other order. Fill progress is written to the orders table as it
+    happens.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        route: Optional[Callable[[str], None]] = None,
+        rest_ms: Optional[float] = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.route = route or self._route_to_exchange
+        self.rest = (
+            rest_ms if rest_ms is not None
+            else settings.ORDER_BOOK_REST_MS) / 1000
+        self.books: Dict[str, OrderBook] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._books_lock = threading.Lock()
+        self._unrouted: List[UUID] = []
+        self._expiry = PeriodicWorker(
+            "order-book-expiry",
+            settings.ORDER_BOOK_SWEEP_INTERVAL_MS / 1000,
+            self.release_expired,
+        )
+
+    @staticmethod
+    def _route_to_exchange(order_id: str) -> None:
+        """Enqueues the unfilled part of an order for the exchange."""
+        enqueue_order_processing(order_id)
+
+    def start(self) -> None:
+        """Starts routing orders out when their rest window ends."""
+        self._expiry.start()
+
+    def stop(self) -> None:
+        """Stops the expiry thread and routes out every resting order."""
+        self._expiry.stop()
+        self._release(lambda book: book.drain())
+
+    def _book(self, instrument: str) -> Tuple[OrderBook, threading.Lock]:
+        """Returns the book of an instrument and the lock guarding it."""
+        with self._books_lock:
+            if instrument not in self.books:
+                self.books[instrument] = OrderBook(instrument)
+                self._locks[instrument] = threading.Lock()
+            return self.books[instrument], self._locks[instrument]
+
+    def submit(self, order: OrderResponseSchema) -> OrderResponseSchema:
+        """Matches a new LIMIT order and returns it with its fills."""
+        book, lock = self._book(order.instrument)
+        reverted = False
+        with lock:
+            taker, fills = book.submit(
+                order.id,
+                order.side,
+                to_ticks(order.limit_price),
+                order.quantity,
+                time.monotonic() + self.rest,
+            )
+            # Written under the book lock so fills reach the database in
+            # the order they happened, and undone in memory if they do not.
+            if fills:
+                try:
+                    self._persist_fills(taker, fills)
+                except DatabaseServiceError:
+                    book.revert(taker, fills)
+                    reverted = True
+
+        if reverted:
+            # The order is already committed; without the book it goes
+            # out like any other order rather than being left behind.
+            logger.warning(
+                f"Order {order.id} could not be matched internally, "
+                "routing it to the exchange.")
+            self.route(str(order.id))
+            return order
+
+        if fills:
+            logger.info(
+                f"Order {order.id} matched {taker.filled} of "
+                f"{order.quantity} internally in {len(fills)} fills.")
+        return order.model_copy(update={
+            "filled_quantity": taker.filled, "status": taker.status})
+
+    def _persist_fills(self, taker: RestingOrder, fills: List[Fill]) -> None:
+        """Records the fill progress of every order in one round trip."""
+        orders = [taker, *{fill.maker.order_id: fill.maker
+                           for fill in fills}.values()]
+        rows = [
+            {
+                "id": order.order_id,
+                "filled_quantity": order.filled,
+                "status": order.status,
+            }
+            for order in orders
+        ]
+
+        db = self.session_factory()
+        try:
+            db.execute(update(Order), rows)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            error_message = (
+                f"Database error occurred while recording fills of order "
+                f"{taker.order_id}: {str(e)}")
+            logger.error(error_message)
+            raise DatabaseServiceError(detail=error_message)
+        finally:
+            db.close()
+
+    def release_expired(self) -> None:
+        """Routes out the orders whose rest window has ended."""
+        now = time.monotonic()
+        self._release(lambda book: book.expire(now))
+
+    def _release(
+        self, take: Callable[[OrderBook], List[RestingOrder]]
+    ) -> None:
+        """Takes orders off every book and routes their unfilled part."""
+        with self._books_lock:
+            books = list(self.books.items())
+
+        order_ids, self._unrouted = self._unrouted, []
+        for instrument, book in books:
+            with self._locks[instrument]:
+                order_ids.extend(order.order_id for order in take(book))
+
+        for index, order_id in enumerate(order_ids):
+            try:
+                self.route(str(order_id))
+            except Exception as e:
+                # Kept for the next pass rather than left without a job.
+                logger.error(
+                    f"Could not route {len(order_ids) - index} orders from "
+                    f"the order book: {str(e)}")
+                self._unrouted.extend(order_ids[index:])
+                return
+
+
+order_book_engine = OrderBookEngine()
@@ -0,0 +1,300 @@
+import argparse
+import itertools
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from redis import Redis
+from rq import Queue
+from rq.registry import clean_registries
+
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.utils.logger import logger_config
+from app.utils.periodic import PeriodicWorker
+
+logger = logger_config("app.orders.retention")
+
+SUMMARY_KEY_PREFIX = "orders:jobs:summary"
+SWEEP_LOCK_KEY = "orders:jobs:sweep-lock"
+JOB_KEY_PREFIX = "rq:job:"
+RESULTS_KEY_PREFIX = "rq:results:"
+# RQ always expires jobs in these states; one without a TTL is leaked.
+TERMINAL_JOB_STATUSES = {"finished", "failed", "stopped", "canceled"}
+SCAN_BATCH_SIZE = 1000
+SUMMARY_COUNTERS = ("count", "attempts", "duration_ms")
+
+
+@dataclass
+class SweepReport:
+    """Counts of keys inspected and removed by one sweep."""
+    scanned: int = 0
+    deleted: int = 0
+
+
+def job_type(description: Optional[str]) -> str:
+    """Short function name of a job, e.g. `process_order_task`."""
+    if not description:
+        return "unknown"
+    return description.split("(", 1)[0].rsplit(".", 1)[-1]
+
+
+def summary_key(timestamp: float) -> str:
+    """Key of the summary bucket that covers `timestamp`."""
+    bucket = settings.JOB_SUMMARY_BUCKET_SECONDS
+    return f"{SUMMARY_KEY_PREFIX}:{int(timestamp // bucket * bucket)}"
+
+
+def job_duration_ms(job: Any) -> int:
+    """Milliseconds since the job's last attempt started."""
+    started_at = job.started_at
+    if started_at is None:
+        return 0
+    if started_at.tzinfo is None:
+        started_at = started_at.replace(tzinfo=timezone.utc)
+    elapsed = datetime.now(timezone.utc) - started_at
+    return max(0, int(elapsed.total_seconds() * 1000))
+
+
+def record_finished_job(redis: Redis, job: Any, outcome: str) -> None:
+    """Folds a finished job into the rolling summary.
+
+    Each bucket is one small hash of counters per job type and outcome,
+    so throughput history outlives the job hashes at a fixed cost.
+
+    Never raises: RQ runs job callbacks inside the job, so an error here
+    would fail, and retry, a job that already placed its order.
+    """
+    try:
+        failures = len(job.meta.get("failures", []))
+        attempts = failures if outcome == "failed" else failures + 1
+        prefix = f"{job_type(job.description)}:{outcome}"
+        key = summary_key(time.time())
+
+        pipeline = redis.pipeline(transaction=False)
+        pipeline.hincrby(key, f"{prefix}:count", 1)
+        pipeline.hincrby(key, f"{prefix}:attempts", attempts)
+        pipeline.hincrby(key, f"{prefix}:duration_ms", job_duration_ms(job))
+        pipeline.expire(key, settings.JOB_SUMMARY_RETENTION_SECONDS)
+        pipeline.execute()
+    except Exception as e:
+        logger.warning(
+            f"Could not record job {getattr(job, 'id', None)} in the "
+            f"summary: {str(e)}")
+
+
+def read_summary(
+    redis: Redis, window_seconds: int
+) -> Dict[str, Dict[str, int]]:
+    """Adds up the summary buckets of the last `window_seconds`."""
+    bucket = settings.JOB_SUMMARY_BUCKET_SECONDS
+    now = time.time()
+    keys = [
+        summary_key(now - offset)
+        for offset in range(0, window_seconds + bucket, bucket)
+    ]
+
+    pipeline = redis.pipeline(transaction=False)
+    for key in dict.fromkeys(keys):
+        pipeline.hgetall(key)
+
+    totals: Dict[str, Dict[str, int]] = defaultdict(
+        lambda: dict.fromkeys(SUMMARY_COUNTERS, 0))
+    for counters in pipeline.execute():
+        for name, value in counters.items():
+            group, counter = _key_name(name).rsplit(":", 1)
+            totals[group][counter] += int(value)
+    return dict(totals)
+
+
+def _scan_chunks(redis: Redis, pattern: str) -> Iterator[List[bytes]]:
+    """Yields matching keys in pipeline-sized chunks as SCAN returns them,
+    so neither Redis (as with KEYS) nor this process holds the whole
+    keyspace at once."""
+    keys = iter(redis.scan_iter(match=pattern, count=SCAN_BATCH_SIZE))
+    while True:
+        chunk = list(itertools.islice(keys, SCAN_BATCH_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _key_name(key: Any) -> str:
+    """Decodes a key or value returned by Redis."""
+    return key.decode() if isinstance(key, bytes) else key
+
+
+def _is_job_hash(name: str) -> bool:
+    """Whether a key is a job hash rather than one of its side keys."""
+    return name.startswith(JOB_KEY_PREFIX) and name.count(":") == 2
+
+
+def sweep_orphaned_keys(redis: Redis) -> SweepReport:
+    """Deletes job metadata that Redis would otherwise keep forever.
+
+    Removes finished job hashes that lost their TTL, partial job hashes
+    left by writes to already-deleted jobs, and results or dependency
+    keys whose job no longer exists.
+    """
+    report = SweepReport()
+    chunks = itertools.chain(
+        _scan_chunks(redis, f"{JOB_KEY_PREFIX}*"),
+        _scan_chunks(redis, f"{RESULTS_KEY_PREFIX}*"),
+    )
+
+    for chunk in chunks:
+        names = [_key_name(key) for key in chunk]
+        pipeline = redis.pipeline(transaction=False)
+        for key, name in zip(chunk, names):
+            pipeline.ttl(key)
+            if _is_job_hash(name):
+                pipeline.hget(key, "status")
+            else:
+                # Results and dependency keys belong to the job they name.
+                pipeline.exists(f"{JOB_KEY_PREFIX}{name.split(':')[2]}")
+        replies = pipeline.execute()
+
+        orphans = []
+        for index, (key, name) in enumerate(zip(chunk, names)):
+            ttl, detail = replies[2 * index], replies[2 * index + 1]
+            if _is_job_hash(name):
+                status = _key_name(detail) if detail is not None else None
+                if status is None or (
+                        status in TERMINAL_JOB_STATUSES and ttl == -1):
+                    orphans.append(key)
+            elif not detail:
+                orphans.append(key)
+
+        report.scanned += len(chunk)
+        if orphans:
+            report.deleted += redis.unlink(*orphans)
+
+    return report
+
+
+def memory_report(redis: Redis) -> Dict[str, Dict[str, int]]:
+    """Measures Redis memory per job type and per key family.
+
+    Job hashes are grouped by their function name and status; every other
+    key by its prefix, e.g. `rq:results` or `ratelimit`.
+    """
+    report: Dict[str, Dict[str, int]] = defaultdict(
+        lambda: {"keys": 0, "bytes": 0})
+
+    for chunk in _scan_chunks(redis, "*"):
+        pipeline = redis.pipeline(transaction=False)
+        names = [_key_name(key) for key in chunk]
+        for key, name in zip(chunk, names):
+            pipeline.memory_usage(key)
+            if _is_job_hash(name):
+                pipeline.hmget(key, "description", "status")
+        replies = iter(pipeline.execute())
+
+        for name in names:
+            size = next(replies) or 0
+            if _is_job_hash(name):
+                description, status = (
+                    _key_name(value) for value in next(replies))
+                group = f"job {job_type(description)} [{status or 'unknown'}]"
+            else:
+                group = ":".join(name.split(":")[:2])
+            report[group]["keys"] += 1
+            report[group]["bytes"] += size
+
+    return dict(report)
+
+
+class JobSweeper:
+    """Periodically cleans RQ registries and deletes orphaned job keys.
+
+    A Redis lock lets one API process sweep per interval however many are
+    running.
+    """
+
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+        self._worker = PeriodicWorker(
+            "job-sweeper",
+            settings.JOB_SWEEP_INTERVAL_SECONDS,
+            self.sweep_if_due,
+        )
+
+    def start(self) -> None:
+        """Starts sweeping in the background."""
+        self._worker.start()
+
+    def stop(self) -> None:
+        """Stops the background sweeper."""
+        self._worker.stop()
+
+    def sweep_if_due(self) -> Optional[SweepReport]:
+        """Sweeps unless another process did so within the interval."""
+        acquired = self.redis.set(
+            SWEEP_LOCK_KEY, "1", nx=True,
+            ex=max(1, int(settings.JOB_SWEEP_INTERVAL_SECONDS)))
+        if not acquired:
+            return None
+        return self.sweep()
+
+    def sweep(self) -> SweepReport:
+        """Cleans expired registry entries, then deletes orphaned keys."""
+        for queue in Queue.all(connection=self.redis):
+            clean_registries(queue)
+        report = sweep_orphaned_keys(self.redis)
+        logger.info(
+            f"Job sweep: {report.deleted} orphaned keys deleted out of "
+            f"{report.scanned} scanned.")
+        return report
+
+
+job_sweeper = JobSweeper(redis_client)
+
+
+def _print_table(rows: Dict[str, Dict[str, int]], columns: List[str]) -> None:
+    """Prints grouped counters as aligned columns."""
+    width = max([len("group"), *(len(group) for group in rows)])
+    print(f"{'group':<{width}}  " + "  ".join(
+        f"{column:>12}" for column in columns))
+    for group, values in rows.items():
+        print(f"{group:<{width}}  " + "  ".join(
+            f"{values[column]:>12}" for column in columns))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point for job retention maintenance."""
+    parser = argparse.ArgumentParser(
+        description="Inspect and bound the job metadata kept in Redis.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser(
+        "report", help="Show Redis memory per job type and key family.")
+    commands.add_parser(
+        "sweep", help="Clean registries and delete orphaned job keys.")
+    summary_command = commands.add_parser(
+        "summary", help="Show finished job counts from the rolling summary.")
+    summary_command.add_argument(
+        "--window", type=int, default=3600,
+        help="Seconds of history to add up.")
+    args = parser.parse_args(argv)
+
+    if args.command == "sweep":
+        report = job_sweeper.sweep()
+        print(f"{report.deleted} of {report.scanned} job keys deleted.")
+        return
+
+    if args.command == "summary":
+        _print_table(
+            read_summary(redis_client, args.window), list(SUMMARY_COUNTERS))
+        return
+
+    report = memory_report(redis_client)
+    for values in report.values():
+        values["bytes/key"] = values["bytes"] // max(1, values["keys"])
+    _print_table(
+        dict(sorted(report.items(), key=lambda item: -item[1]["bytes"])),
+        ["keys", "bytes", "bytes/key"])
+
+
+if __name__ == "__main__":
+    main()
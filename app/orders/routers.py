@@ -1,11 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException
+import math
+import time
+from datetime import datetime
+from typing import Generator, Optional, Set
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 
-from app.core.redis import redis_client
-from app.core.database import get_session
+from app.core.config import settings
+from app.core.redis import dedupe_store
+from app.core.database import get_read_session, get_session
 from app.utils.logger import logger_config
+from app.utils.profiling import ProfiledRoute
+from app.orders.admission import admission_controller
+from app.orders.dead_letters import count_dead_letters, list_dead_letters
+from app.orders.exceptions import AdmissionRejectedError
+from app.orders.models import OrderType
+from app.orders.order_book import order_book_engine
 from app.orders.schemas import (
-    CreateOrderSchema, OrderResponseSchema, OrderListResponseSchema)
+    CreateOrderSchema,
+    DeadLetterListResponseSchema,
+    DeadLetterStatsResponseSchema,
+    OrderListResponseSchema,
+    OrderResponseSchema,
+)
 from app.orders.services import OrderService
 from app.orders.tasks import enqueue_order_processing
 from app.utils.common import generate_order_key
@@ -13,21 +30,94 @@ from app.utils.common import generate_order_key
 logger = logger_config("app.orders.routers")
 
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 SECONDS_BEFORE_ALLOWED = 5
+CLIENT_ID_HEADER = "X-Client-Id"
+LAST_WRITE_COOKIE = "last_write_at"
+
+
+def trusted_proxies() -> Set[str]:
+    """Addresses of the gateways allowed to name the client."""
+    return {
+        host.strip()
+        for host in settings.RATE_LIMIT_TRUSTED_PROXIES.split(",")
+        if host.strip()
+    }
+
+
+def get_client_id(request: Request) -> str:
+    """Identify the caller for rate limiting purposes.
+
+    The client id header is unauthenticated, so it is only honoured when
+    set by a trusted gateway; any other caller is keyed on its address.
+    """
+    host = request.client.host if request.client else "anonymous"
+    client_id = request.headers.get(CLIENT_ID_HEADER)
+    if client_id and host in trusted_proxies():
+        return f"id:{client_id}"
+    return f"addr:{host}"
+
+
+def get_last_write_at(request: Request) -> Optional[float]:
+    """Read when the caller last wrote, for read-your-writes routing."""
+    try:
+        return float(request.cookies[LAST_WRITE_COOKIE])
+    except (KeyError, ValueError):
+        return None
 
 
-@router.post("", response_model=OrderResponseSchema, status_code=201)
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """Provide a replica session that can see the caller's own writes."""
+    yield from get_read_session(last_write_at=get_last_write_at(request))
+
+
+def remember_write(response: Response) -> None:
+    """Mark the caller as having just written to the primary."""
+    response.set_cookie(
+        LAST_WRITE_COOKIE,
+        str(time.time()),
+        max_age=math.ceil(
+            settings.REPLICA_MAX_LAG_SECONDS
+            + settings.REPLICA_HEALTH_CHECK_INTERVAL_SECONDS),
+        httponly=True,
+    )
+
+
+def admit_order(request: Request) -> None:
+    """Shed load or rate limit the caller before an order is accepted."""
+    if not settings.ADMISSION_CONTROL_ENABLED:
+        return
+
+    try:
+        admission_controller.check_load()
+        if settings.RATE_LIMIT_ENABLED:
+            admission_controller.check_rate_limit(get_client_id(request))
+    except AdmissionRejectedError as e:
+        logger.warning(f"Order rejected by admission control: {e.detail}")
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+@router.post(
+    "",
+    response_model=OrderResponseSchema,
+    status_code=201,
+    dependencies=[Depends(admit_order)],
+)
 def create_order_endpoint(
     order_data: CreateOrderSchema,
+    response: Response,
     db: Session = Depends(get_session)
 ):
     """API endpoint to create an order."""
 
     order_key = generate_order_key(order_data)
 
-    if redis_client.exists(order_key):
+    if dedupe_store.exists(order_key):
         logger.warning(
             f"Duplicate order detected for {order_data.instrument}.")
         raise HTTPException(
@@ -39,7 +129,7 @@ def create_order_endpoint(
         logger.info(
             f"Processing order for {order_data.instrument}. Setting Redis lock."
         )
-        redis_client.setex(order_key, SECONDS_BEFORE_ALLOWED, "processing")
+        dedupe_store.setex(order_key, SECONDS_BEFORE_ALLOWED, "processing")
 
         order = OrderService.create_order(db, order_data)
 
@@ -48,7 +138,11 @@ def create_order_endpoint(
             "Enqueueing background task for processing."
         )
 
-        enqueue_order_processing(order_id=order.id)
+        if settings.ORDER_BOOK_ENABLED and order.type == OrderType.LIMIT:
+            order = order_book_engine.submit(order)
+        else:
+            enqueue_order_processing(order_id=order.id, order=order)
+        remember_write(response)
 
         return order
     except Exception as e:
@@ -60,7 +154,7 @@ def create_order_endpoint(
 
 @router.get("", response_model=OrderListResponseSchema)
 def get_orders(
-    skip: int = 0, limit: int = 10, db: Session = Depends(get_session)
+    skip: int = 0, limit: int = 10, db: Session = Depends(get_read_db)
 ):
     try:
         orders = OrderService.list_orders(db=db, limit=limit, skip=skip)
@@ -70,3 +164,40 @@ def get_orders(
             f"Internal server error while fetching saved orders: {str(e)}")
         logger.error(error_message)
         raise HTTPException(status_code=500, detail=(error_message))
+
+
+@router.get("/dead-letters", response_model=DeadLetterListResponseSchema)
+def get_dead_letters(
+    error_class: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 10,
+    db: Session = Depends(get_read_db),
+):
+    """API endpoint to list orders that failed on every attempt."""
+    try:
+        return list_dead_letters(
+            db, error_class, since, until, limit=limit, skip=skip)
+    except Exception as e:
+        error_message = (
+            f"Internal server error while fetching dead letters: {str(e)}")
+        logger.error(error_message)
+        raise HTTPException(status_code=500, detail=error_message)
+
+
+@router.get(
+    "/dead-letters/stats", response_model=DeadLetterStatsResponseSchema)
+def get_dead_letter_stats(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_read_db),
+):
+    """API endpoint to count dead-lettered orders per error class."""
+    try:
+        return {"counts": count_dead_letters(db, since, until)}
+    except Exception as e:
+        error_message = (
+            f"Internal server error while counting dead letters: {str(e)}")
+        logger.error(error_message)
+        raise HTTPException(status_code=500, detail=error_message)
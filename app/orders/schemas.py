@@ -1,6 +1,7 @@
+import json
 from decimal import Decimal
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID
 
 from pydantic import BaseModel, Field, model_validator, field_validator
@@ -12,6 +13,13 @@ InstrumentStr = Annotated[str, Field(min_length=12, max_length=12)]
 LimitPrice = Annotated[Optional[Decimal], Field(None, decimal_places=2)]
 QuantityInt = Annotated[int, Field(gt=0)]
 
+MARKET_LIMIT_PRICE_ERROR = (
+    "Providing a `limit_price` is prohibited for type `market`")
+LIMIT_PRICE_REQUIRED_ERROR = (
+    "Attribute `limit_price` is required for type `limit`")
+LIMIT_PRICE_POSITIVE_ERROR = (
+    "The limit price must be greater than 0 for limit orders.")
+
 
 class CreateOrderSchema(BaseModel):
     """Schema for creating an order, used for input validation."""
@@ -39,8 +47,7 @@ class CreateOrderSchema(BaseModel):
     def validate_market_order(limit_price: Optional[Decimal]) -> None:
         """Validates that a market order does not include a limit price."""
         if limit_price is not None:
-            raise ValueError(
-                "Providing a `limit_price` is prohibited for type `market`")
+            raise ValueError(MARKET_LIMIT_PRICE_ERROR)
         if limit_price == 0:
             raise ValueError("`limit_price` cannot be 0 for type `market`")
 
@@ -48,11 +55,9 @@ class CreateOrderSchema(BaseModel):
     def validate_limit_order(limit_price: Optional[Decimal]) -> None:
         """Validates that a limit order has a valid limit price."""
         if limit_price is None:
-            raise ValueError(
-                "Attribute `limit_price` is required for type `limit`")
+            raise ValueError(LIMIT_PRICE_REQUIRED_ERROR)
         if limit_price <= 0:
-            raise ValueError(
-                "The limit price must be greater than 0 for limit orders.")
+            raise ValueError(LIMIT_PRICE_POSITIVE_ERROR)
 
 
 class OrderResponseSchema(BaseModel):
@@ -65,6 +70,7 @@ class OrderResponseSchema(BaseModel):
     instrument: str
     limit_price: Optional[Decimal]
     quantity: int
+    filled_quantity: int = 0
     status: OrderStatus
 
     model_config = {"from_attributes": True}
@@ -78,6 +84,38 @@ class OrderListResponseSchema(BaseModel):
     skip: int
 
 
+class DeadLetterSchema(BaseModel):
+    """Schema used to return a dead-lettered order."""
+    order_id: UUID
+    error_class: str
+    error_message: str
+    attempts: int
+    history: List[Tuple[int, str]]
+    failed_at: datetime
+
+    model_config = {"from_attributes": True}
+
+    @field_validator("history", mode="before")
+    def parse_history(cls, value):
+        """Unpacks the compact JSON attempt history."""
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
+
+
+class DeadLetterListResponseSchema(BaseModel):
+    """Schema for listing dead-lettered orders with pagination details."""
+    total: int
+    dead_letters: List[DeadLetterSchema]
+    limit: int
+    skip: int
+
+
+class DeadLetterStatsResponseSchema(BaseModel):
+    """Schema for dead-lettered order counts per error class."""
+    counts: Dict[str, int]
+
+
 class OrderIdValidator(BaseModel):
     """Validator for ensuring the order ID is a valid UUID."""
     order_id: UUID
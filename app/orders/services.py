@@ -1,9 +1,13 @@
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, OperationalError
 
+from app.core.config import settings
 from app.orders.schemas import CreateOrderSchema, OrderResponseSchema
 from app.orders.models import Order
 from app.orders.exceptions import DatabaseServiceError
+from app.orders.group_commit import group_commit_writer
 from app.utils.logger import logger_config
 
 logger = logger_config("app.orders.services")
@@ -15,6 +19,9 @@ class OrderService:
     @staticmethod
     def create_order(db: Session, order_data: CreateOrderSchema) -> OrderResponseSchema:
         """Create an order and return the response schema."""
+        if settings.GROUP_COMMIT_ENABLED:
+            return OrderService.create_order_grouped(order_data)
+
         try:
             logger.info(f"Creating order with data: {order_data}")
             order = Order(
@@ -42,6 +49,35 @@ class OrderService:
             logger.error(error_message)
             raise DatabaseServiceError(detail=error_message)
 
+    @staticmethod
+    def create_order_grouped(
+        order_data: CreateOrderSchema
+    ) -> OrderResponseSchema:
+        """Create an order through the shared group-commit writer."""
+        logger.info(f"Creating order with data: {order_data}")
+        future = group_commit_writer.submit(order_data)
+        timeout = settings.GROUP_COMMIT_TIMEOUT_SECONDS
+        try:
+            order = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Withdrawn so the writer does not commit an order the caller
+            # has already reported as failed. If the writer has started on
+            # it, the write is in flight and gets one more timeout.
+            order = None
+            if not future.cancel():
+                try:
+                    order = future.result(timeout=timeout)
+                except FutureTimeoutError:
+                    pass
+
+        if order is None:
+            error_message = "Timed out waiting for the order to be committed."
+            logger.error(error_message)
+            raise DatabaseServiceError(detail=error_message)
+
+        logger.info(f"Order {order.id} created successfully.")
+        return order
+
     @staticmethod
     def list_orders(db: Session, limit: int = 10, skip: int = 0) -> dict:
         """List orders with pagination."""
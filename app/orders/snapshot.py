@@ -0,0 +1,111 @@
+import struct
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from uuid import UUID
+
+from app.orders.models import OrderSide, OrderType, OrderStatus
+from app.orders.schemas import OrderResponseSchema
+
+SNAPSHOT_VERSION = 2
+
+# version, id, type, side, status, instrument, limit price in cents,
+# quantity, created_at and updated_at in microseconds since the epoch.
+SNAPSHOT_V1 = struct.Struct(">B16sBBB12sqqqq")
+# Version 1 followed by the filled quantity. Version 1 records, from jobs
+# enqueued before an upgrade, are still read, as unfilled orders.
+SNAPSHOT_V2 = struct.Struct(">B16sBBB12sqqqqq")
+
+SNAPSHOT_FORMATS = {1: SNAPSHOT_V1, 2: SNAPSHOT_V2}
+
+NO_LIMIT_PRICE = -(2 ** 63)
+
+ORDER_TYPES = tuple(OrderType)
+ORDER_SIDES = tuple(OrderSide)
+ORDER_STATUSES = tuple(OrderStatus)
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+class SnapshotError(ValueError):
+    """Raised when an order snapshot cannot be encoded or decoded."""
+    pass
+
+
+def _to_micros(value: datetime) -> int:
+    """Converts a datetime into microseconds since the epoch."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - EPOCH) // MICROSECOND
+
+
+def _from_micros(value: int) -> datetime:
+    """Converts microseconds since the epoch into a naive datetime."""
+    return EPOCH + value * MICROSECOND
+
+
+def encode_order_snapshot(order: OrderResponseSchema) -> bytes:
+    """Packs an order into a compact, versioned binary record."""
+    instrument = order.instrument.encode("utf-8")
+    if len(instrument) > 12:
+        raise SnapshotError(
+            f"Instrument {order.instrument!r} does not fit in a snapshot.")
+
+    limit_price = NO_LIMIT_PRICE
+    if order.limit_price is not None:
+        limit_price = int((order.limit_price * 100).to_integral_value())
+
+    return SNAPSHOT_V2.pack(
+        SNAPSHOT_VERSION,
+        order.id.bytes,
+        ORDER_TYPES.index(order.type),
+        ORDER_SIDES.index(order.side),
+        ORDER_STATUSES.index(order.status),
+        instrument,
+        limit_price,
+        order.quantity,
+        _to_micros(order.created_at),
+        _to_micros(order.updated_at),
+        order.filled_quantity,
+    )
+
+
+def decode_order_snapshot(payload: bytes) -> OrderResponseSchema:
+    """Unpacks a binary record produced by `encode_order_snapshot`."""
+    version = payload[0] if payload else None
+    if version not in SNAPSHOT_FORMATS:
+        raise SnapshotError(f"Unsupported order snapshot version: {version}")
+
+    try:
+        fields = SNAPSHOT_FORMATS[version].unpack(payload)
+    except struct.error as e:
+        raise SnapshotError(f"Malformed order snapshot: {str(e)}")
+    (
+        _,
+        order_id,
+        type_code,
+        side_code,
+        status_code,
+        instrument,
+        limit_price,
+        quantity,
+        created_at,
+        updated_at,
+    ) = fields[:10]
+    filled_quantity = fields[10] if version >= 2 else 0
+
+    return OrderResponseSchema(
+        id=UUID(bytes=order_id),
+        created_at=_from_micros(created_at),
+        updated_at=_from_micros(updated_at),
+        type=ORDER_TYPES[type_code],
+        side=ORDER_SIDES[side_code],
+        instrument=instrument.rstrip(b"\0").decode("utf-8"),
+        limit_price=(
+            None if limit_price == NO_LIMIT_PRICE
+            else Decimal(limit_price).scaleb(-2)
+        ),
+        quantity=quantity,
+        filled_quantity=filled_quantity,
+        status=ORDER_STATUSES[status_code],
+    )
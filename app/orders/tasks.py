@@ -1,25 +1,54 @@
+import json
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import case, delete, literal, update
 from sqlalchemy.orm import Session
-from rq import Queue, Retry
+from rq import Callback, Queue, Retry
 
+from app.core.config import settings
 from app.core.database import get_session
+from app.core.embedded_queue import embedded_queue
 from app.core.redis import redis_client
 from app.utils.logger import logger_config
+from app.utils.profiling import profile_job
 from app.utils.external_service import simulate_external_call, ExternalServiceError
-from app.orders.models import Order, OrderStatus
+from app.orders.models import DeadLetter, Order, OrderStatus
 from app.orders.schemas import OrderResponseSchema, OrderIdValidator
 from app.orders.exceptions import OrderNotFoundError, RedisTaskQueueError
+from app.orders.retention import record_finished_job
+from app.orders.snapshot import encode_order_snapshot, decode_order_snapshot
 
 
 logger = logger_config("app.orders.tasks")
 
+JOB_TIMEOUT = 60
+JOB_MAX_RETRIES = 5
+JOB_RETRY_INTERVAL = 10
+
+# Job meta keys shared by RQ and embedded jobs.
+ORDER_ID_META_KEY = "order_id"
+FAILURES_META_KEY = "failures"
+MAX_DEAD_LETTER_MESSAGE_LENGTH = 500
+
+# Statuses a snapshot-driven job may still overwrite; a retry follows FAILED.
+SNAPSHOT_UPDATABLE_STATUSES = (
+    OrderStatus.PENDING, OrderStatus.FAILED, OrderStatus.PARTIALLY_FILLED)
+
 
 class OrderProcessor:
     """Handles order processing and error handling."""
 
-    def __init__(self, order_task: OrderIdValidator) -> None:
+    def __init__(
+        self,
+        order_task: OrderIdValidator,
+        snapshot: Optional[OrderResponseSchema] = None
+    ) -> None:
         self.order_id = order_task.order_id
         self.db: Session = next(get_session())
         self.order = None
+        self.snapshot = snapshot
 
     def fetch_order(self) -> None:
         """Fetches order and processing task from the database."""
@@ -32,16 +61,52 @@ class OrderProcessor:
 
     def update_status(self, order_status: OrderStatus) -> None:
         """Updates order and task status in the database."""
-        if self.order:
+        if self.snapshot is not None:
+            self.update_status_conditionally(order_status)
+        elif self.order:
             self.order.status = order_status
+            if order_status == OrderStatus.COMPLETED:
+                self.order.filled_quantity = self.order.quantity
             self.db.commit()
 
+    def update_status_conditionally(self, order_status: OrderStatus) -> None:
+        """Updates the status only if the order has not completed since
+        the snapshot was taken."""
+        values = {"status": order_status}
+        if order_status == OrderStatus.COMPLETED:
+            values["filled_quantity"] = Order.quantity
+        result = self.db.execute(
+            update(Order)
+            .where(
+                Order.id == self.order_id,
+                Order.status.in_(SNAPSHOT_UPDATABLE_STATUSES),
+            )
+            .values(**values)
+        )
+        self.db.commit()
+
+        if result.rowcount == 0:
+            logger.warning(
+                f"Order {self.order_id} is no longer pending, "
+                f"status {order_status.value} was not applied.")
+
     def process(self):
         """Main method to process the order."""
         try:
-            self.fetch_order()
-            logger.info(f"Placing order {self.order_id} in stock exchange.")
-            order_data = OrderResponseSchema.model_validate(self.order)
+            if self.snapshot is None:
+                self.fetch_order()
+                order_data = OrderResponseSchema.model_validate(self.order)
+            else:
+                order_data = self.snapshot
+            if order_data.filled_quantity:
+                # Only what the internal order book could not match.
+                order_data = order_data.model_copy(update={
+                    "quantity": (
+                        order_data.quantity - order_data.filled_quantity),
+                })
+            logger.info(
+                f"Placing {order_data.quantity} of order {self.order_id} "
+                "in stock exchange.")
 
             simulate_external_call(order_data)
 
@@ -57,7 +122,7 @@ class OrderProcessor:
             error_message = (
                 f"Order {self.order_id} failed to be placed: {str(e)}")
             logger.error(error_message)
-            raise RuntimeError(error_message)
+            raise RuntimeError(error_message) from e
 
         except Exception as e:
             self.db.rollback()
@@ -65,7 +130,7 @@ class OrderProcessor:
             error_message = (
                 f"Critical error processing order {self.order_id}: {str(e)}")
             logger.critical(error_message)
-            raise RuntimeError(error_message)
+            raise RuntimeError(error_message) from e
 
         finally:
             self.db.close()
@@ -74,24 +139,124 @@ class OrderProcessor:
 def process_order_task(order_id: str):
     """Wrapper function to instantiate and run the order processor."""
     processor = OrderProcessor(OrderIdValidator(order_id=order_id))
-    processor.process()
+    with profile_job(f"process_order_task {order_id}"):
+        processor.process()
+
+
+def process_order_snapshot_task(payload: bytes):
+    """Run the order processor from a snapshot without fetching the order."""
+    snapshot = decode_order_snapshot(payload)
+    processor = OrderProcessor(
+        OrderIdValidator(order_id=snapshot.id), snapshot=snapshot)
+    with profile_job(f"process_order_snapshot_task {snapshot.id}"):
+        processor.process()
+
+
+def error_class_name(error: BaseException) -> str:
+    """Names the error that made a job fail, looking past the processor's
+    RuntimeError wrapper to its cause."""
+    return type(error.__cause__ or error).__name__
+
+
+def record_dead_letter(
+    order_id: str, error: BaseException, failures: List[List[Any]]
+) -> None:
+    """Stores an order whose processing failed on every attempt."""
+    order_uuid = UUID(str(order_id))
+    db = next(get_session())
+    try:
+        db.execute(delete(DeadLetter).where(DeadLetter.order_id == order_uuid))
+        db.add(DeadLetter(
+            order_id=order_uuid,
+            error_class=error_class_name(error),
+            error_message=str(error)[:MAX_DEAD_LETTER_MESSAGE_LENGTH],
+            attempts=len(failures),
+            history=json.dumps(failures, separators=(",", ":")),
+        ))
+        db.commit()
+    finally:
+        db.close()
+    logger.error(
+        f"Order {order_id} dead-lettered after {len(failures)} attempts.")
+
+
+def note_order_failure(job: Any, error: BaseException) -> None:
+    """Adds a failed attempt to the job's history and dead-letters the
+    order once no retries are left. Works for RQ and embedded jobs."""
+    failures = job.meta.setdefault(FAILURES_META_KEY, [])
+    failures.append([int(time.time()), error_class_name(error)])
+    if not job.should_retry:
+        record_dead_letter(job.meta[ORDER_ID_META_KEY], error, failures)
+
+
+def on_order_job_failure(job, connection, exc_type, exc_value, traceback):
+    """RQ failure callback, run after every failed attempt."""
+    note_order_failure(job, exc_value)
+    job.save_meta()
+    if not job.should_retry:
+        record_finished_job(connection, job, "failed")
 
 
-def enqueue_order_processing(order_id: str) -> None:
-    """Enqueue the task to process the order."""
+def on_order_job_success(job, connection, result):
+    """RQ success callback; runs before a zero result TTL drops the job."""
+    record_finished_job(connection, job, "succeeded")
+
+
+def order_job_meta(order_id: str) -> Dict[str, Any]:
+    """Job meta that lets failure callbacks find the order."""
+    return {ORDER_ID_META_KEY: str(order_id)}
+
+
+def enqueue_order_processing(
+    order_id: str,
+    order: Optional[OrderResponseSchema] = None,
+    block: bool = False,
+) -> None:
+    """Enqueue the task to process the order.
+
+    When snapshot payloads are enabled and the order is given, the job
+    carries the packed order instead of its id. With `block`, a full
+    embedded queue is waited on instead of failing; only callers outside
+    the event loop may do so.
+    """
 
     try:
         retry_options = Retry(
-            max=5,
-            interval=10,
+            max=JOB_MAX_RETRIES,
+            interval=JOB_RETRY_INTERVAL,
         )
+        if settings.ORDER_SNAPSHOT_PAYLOADS and order is not None:
+            task, task_arg = (
+                process_order_snapshot_task, encode_order_snapshot(order))
+        else:
+            task, task_arg = process_order_task, order_id
+
+        if settings.EXECUTION_MODE == "embedded":
+            embedded_queue.enqueue(
+                task,
+                task_arg,
+                key=str(order_id),
+                timeout=JOB_TIMEOUT,
+                max_retries=JOB_MAX_RETRIES,
+                retry_interval=JOB_RETRY_INTERVAL,
+                meta=order_job_meta(order_id),
+                on_failure=note_order_failure,
+                block=block,
+            )
+            logger.info(f"Order {order_id} handed to the embedded queue.")
+            return
+
         queue = Queue(connection=redis_client)
         job = queue.enqueue(
-            process_order_task,
-            order_id,
-            job_timeout=60,
-            result_ttl=5000,
-            retry=retry_options
+            task,
+            task_arg,
+            job_timeout=JOB_TIMEOUT,
+            result_ttl=settings.JOB_RESULT_TTL_SECONDS,
+            failure_ttl=settings.JOB_FAILURE_TTL_SECONDS,
+            retry=retry_options,
+            meta=order_job_meta(order_id),
+            on_success=Callback(on_order_job_success),
+            on_failure=Callback(on_order_job_failure),
         )
 
         logger.info(
@@ -102,3 +267,89 @@ def enqueue_order_processing(order_id: str) -> None:
             f"Failed to enqueue task for order {order_id}: {str(e)}")
         logger.error(error_message)
         raise RedisTaskQueueError(error_message)
+
+
+def enqueue_order_batch(order_ids: Iterable[str]) -> List[str]:
+    """Enqueue processing for many orders in a single Redis round trip."""
+
+    order_ids = [str(order_id) for order_id in order_ids]
+    if not order_ids:
+        return []
+
+    try:
+        retry_options = Retry(
+            max=JOB_MAX_RETRIES,
+            interval=JOB_RETRY_INTERVAL,
+        )
+        queue = Queue(connection=redis_client)
+        jobs = queue.enqueue_many([
+            Queue.prepare_data(
+                process_order_task,
+                args=(order_id,),
+                timeout=JOB_TIMEOUT,
+                result_ttl=settings.JOB_RESULT_TTL_SECONDS,
+                failure_ttl=settings.JOB_FAILURE_TTL_SECONDS,
+                retry=retry_options,
+                meta=order_job_meta(order_id),
+                on_success=Callback(on_order_job_success),
+                on_failure=Callback(on_order_job_failure),
+            )
+            for order_id in order_ids
+        ])
+
+        logger.info(f"Enqueued {len(jobs)} order processing jobs.")
+        return [job.id for job in jobs]
+
+    except Exception as e:
+        error_message = (
+            f"Failed to enqueue tasks for {len(order_ids)} orders: {str(e)}")
+        logger.error(error_message)
+        raise RedisTaskQueueError(error_message)
+
+
+def reprocessed_status():
+    """SQL expression for the status of an order about to be processed
+    again: PARTIALLY_FILLED if anything was filled, otherwise PENDING."""
+    return case(
+        (
+            Order.filled_quantity > 0,
+            literal(OrderStatus.PARTIALLY_FILLED, Order.status.type),
+        ),
+        else_=literal(OrderStatus.PENDING, Order.status.type),
+    )
+
+
+def restore_pending_orders(order_ids: List[str]) -> None:
+    """Reset orders left over by the last embedded shutdown so they can be
+    processed again, and enqueue them.
+
+    Jobs still running at shutdown are persisted too and may have
+    completed before the process exited; those are left alone so they
+    are not sent to the exchange twice. There may be more orders than the
+    queue holds, so this waits for room and must run outside the event
+    loop.
+    """
+
+    if not order_ids:
+        return
+
+    db = next(get_session())
+    try:
+        restored = db.scalars(
+            update(Order)
+            .where(
+                Order.id.in_([UUID(str(order_id)) for order_id in order_ids]),
+                Order.status != OrderStatus.COMPLETED,
+            )
+            .values(status=reprocessed_status())
+            .returning(Order.id)
+        ).all()
+        db.commit()
+    finally:
+        db.close()
+
+    for order_id in restored:
+        enqueue_order_processing(str(order_id), block=True)
+    logger.info(
+        f"Re-enqueued {len(restored)} of {len(order_ids)} orders from the "
+        f"last shutdown.")
@@ -0,0 +1,62 @@
+import argparse
+import os
+from typing import List, Optional
+
+import uvicorn
+
+from app.core.config import settings
+from app.core.database import dispose_engines
+from app.core.schema import ensure_schema
+from app.orders import models  # noqa: F401  (registers the tables)
+from app.utils.logger import logger_config
+
+logger = logger_config("app.server")
+
+
+def worker_count(requested: Optional[int] = None) -> int:
+    """Number of API workers: as requested, as configured or one per CPU."""
+    return requested or settings.WEB_CONCURRENCY or os.cpu_count() or 1
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Production entry point: migrates once, then serves the API from
+    several worker processes."""
+    parser = argparse.ArgumentParser(
+        description="Run the API with multiple worker processes.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Worker processes (default: WEB_CONCURRENCY or CPU count).")
+    args = parser.parse_args(argv)
+
+    workers = worker_count(args.workers)
+    if settings.EXECUTION_MODE == "embedded" and workers > 1:
+        parser.error(
+            "embedded mode keeps its queue and state file in one process; "
+            "run it with --workers 1.")
+    if settings.ORDER_BOOK_ENABLED and workers > 1:
+        parser.error(
+            "the order book matches orders within one process; "
+            "run it with --workers 1.")
+
+    # Done once here so the workers only find an up-to-date schema.
+    version = ensure_schema()
+    dispose_engines()
+
+    logger.info(
+        f"Starting {workers} workers on {args.host}:{args.port} "
+        f"(schema version {version}).")
+
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        proxy_headers=True,
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
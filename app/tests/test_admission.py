@@ -0,0 +1,191 @@
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.orders.admission import (
+    AdmissionController, AdmissionSnapshot, admission_controller)
+from app.orders.exceptions import AdmissionRejectedError
+
+ORDER_PAYLOAD = {
+    "type": "market",
+    "side": "buy",
+    "instrument": "stringstring",
+    "quantity": 10,
+}
+
+
+class TestAdmissionController:
+    """Tests for sampling and shedding decisions."""
+
+    @pytest.fixture
+    def controller(self) -> AdmissionController:
+        """Controller backed by mocked Redis and database engine."""
+        redis = MagicMock()
+        db_engine = MagicMock()
+        db_engine.pool.size.return_value = 5
+        db_engine.pool._max_overflow = 5
+        db_engine.pool.checkedout.return_value = 5
+        return AdmissionController(redis, db_engine)
+
+    def test_sample_reads_queue_and_pool(
+        self, controller: AdmissionController
+    ) -> None:
+        """Test the sampler measures depth, oldest job age and saturation."""
+        controller.redis.llen.return_value = 3
+        oldest_job = MagicMock()
+        oldest_job.enqueued_at = datetime.now(timezone.utc) - timedelta(
+            seconds=30)
+        controller.queue.get_job_ids = MagicMock(return_value=["job-1"])
+        controller.queue.fetch_job = MagicMock(return_value=oldest_job)
+
+        snapshot = controller.sample()
+
+        assert snapshot.queue_depth == 3
+        assert 29 <= snapshot.oldest_job_age <= 31
+        assert snapshot.pool_saturation == 0.5
+
+    @pytest.mark.parametrize(
+        "snapshot",
+        [
+            AdmissionSnapshot(queue_depth=10000),
+            AdmissionSnapshot(oldest_job_age=600.0),
+            AdmissionSnapshot(pool_saturation=1.0),
+        ],
+    )
+    def test_check_load_sheds_past_thresholds(
+        self, controller: AdmissionController, snapshot: AdmissionSnapshot
+    ) -> None:
+        """Test overload is rejected with 503."""
+        controller.snapshot = replace(snapshot, sampled_at=time.time())
+
+        with pytest.raises(AdmissionRejectedError) as exc_info:
+            controller.check_load()
+
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.retry_after > 0
+
+    def test_check_load_admits_healthy_snapshot(
+        self, controller: AdmissionController
+    ) -> None:
+        """Test a healthy snapshot admits orders."""
+        controller.snapshot = AdmissionSnapshot(
+            queue_depth=1, sampled_at=time.time())
+        controller.check_load()
+
+    def test_stale_snapshot_admits(
+        self, controller: AdmissionController
+    ) -> None:
+        """Test an overload reading stops counting once sampling fails."""
+        controller.snapshot = AdmissionSnapshot(
+            queue_depth=10000, sampled_at=time.time() - 60)
+        controller.check_load()
+
+    def test_pool_is_sampled_when_queue_read_fails(
+        self, controller: AdmissionController
+    ) -> None:
+        """Test a failing Redis read does not freeze the pool reading."""
+        controller.redis.llen.side_effect = ConnectionError("refused")
+
+        snapshot = controller.sample()
+
+        assert snapshot.queue_depth == 0
+        assert snapshot.pool_saturation == 0.5
+        assert snapshot.sampled_at > 0
+
+    def test_rate_limit_rejects_empty_bucket(
+        self, controller: AdmissionController
+    ) -> None:
+        """Test an empty token bucket is rejected with 429."""
+        controller._rate_limit_script = MagicMock(return_value=[0, 1500])
+
+        with pytest.raises(AdmissionRejectedError) as exc_info:
+            controller.check_rate_limit("client-a")
+
+        assert exc_info.value.status_code == 429
+        assert exc_info.value.retry_after == 2
+        call_kwargs = controller._rate_limit_script.call_args.kwargs
+        assert call_kwargs["keys"] == ["ratelimit:client-a"]
+
+    def test_rate_limit_fails_open(
+        self, controller: AdmissionController
+    ) -> None:
+        """Test orders are admitted when Redis cannot be reached."""
+        controller._rate_limit_script = MagicMock(
+            side_effect=ConnectionError("Connection refused"))
+        controller.check_rate_limit("client-a")
+
+
+class TestAdmissionEndpoint:
+    """Tests for admission control on POST /orders."""
+
+    @pytest.fixture(autouse=True)
+    def rate_limit_enabled(self, mocker: MagicMock) -> None:
+        """Enable the per-client rate limit, which is off by default."""
+        mocker.patch("app.orders.routers.settings.RATE_LIMIT_ENABLED", True)
+
+    def test_overloaded_queue_returns_503(
+        self, client: TestClient, mocker: MagicMock
+    ) -> None:
+        """Test shed orders get 503 with a Retry-After header."""
+        mocker.patch(
+            "app.orders.admission.settings.ADMISSION_MAX_QUEUE_DEPTH", 0)
+        mock_task_processing = mocker.patch(
+            "app.orders.routers.enqueue_order_processing")
+        admission_controller.sample()
+
+        response = client.post("/orders", json=ORDER_PAYLOAD)
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "5"
+        mock_task_processing.assert_not_called()
+
+    def test_rate_limited_client_returns_429(
+        self, client: TestClient, mocker: MagicMock
+    ) -> None:
+        """Test throttled clients get 429 with a Retry-After header."""
+        mocker.patch(
+            "app.orders.routers.admission_controller._rate_limit_script",
+            return_value=[0, 200],
+        )
+
+        response = client.post(
+            "/orders", json=ORDER_PAYLOAD, headers={"X-Client-Id": "desk-1"})
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "1"
+
+    def test_client_id_is_ignored_from_untrusted_callers(
+        self, client: TestClient, mocker: MagicMock
+    ) -> None:
+        """Test a caller cannot pick a fresh bucket per request."""
+        mock_script = mocker.patch(
+            "app.orders.routers.admission_controller._rate_limit_script",
+            return_value=[0, 200],
+        )
+
+        client.post(
+            "/orders", json=ORDER_PAYLOAD, headers={"X-Client-Id": "desk-2"})
+
+        assert mock_script.call_args.kwargs["keys"] == [
+            "ratelimit:addr:testclient"]
+
+    def test_client_id_is_honoured_from_trusted_gateway(
+        self, client: TestClient, mocker: MagicMock
+    ) -> None:
+        """Test a gateway can rate limit per client behind one address."""
+        mocker.patch(
+            "app.orders.routers.settings.RATE_LIMIT_TRUSTED_PROXIES",
+            "10.0.0.1, testclient")
+        mock_script = mocker.patch(
+            "app.orders.routers.admission_controller._rate_limit_script",
+            return_value=[0, 200],
+        )
+
+        client.post(
+            "/orders", json=ORDER_PAYLOAD, headers={"X-Client-Id": "desk-2"})
+
+        assert mock_script.call_args.kwargs["keys"] == ["ratelimit:id:desk-2"]
@@ -0,0 +1,109 @@
+import csv
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from sqlalchemy.orm import Session
+
+from app.core.database import get_engine
+from app.orders.bulk_import import import_orders, read_order_chunks, validate_chunk
+from app.orders.models import Order, OrderSide, OrderStatus, OrderType
+
+CSV_ROWS = [
+    "type,side,instrument,limit_price,quantity",
+    "limit,buy,BULKIMPORT01,150.25,100",
+    "market,sell,BULKIMPORT01,,10",
+    "limit,sell,BULKIMPORT01,,5",
+    "market,buy,BULKIMPORT01,10.00,5",
+    "limit,buy,short,-1,0",
+    "stop,hold,BULKIMPORT01,1.999,abc",
+]
+
+
+class TestBulkImport:
+    """Tests for columnar bulk imports of orders."""
+
+    @pytest.fixture
+    def orders_csv(self, tmp_path: Path) -> Path:
+        """Write a CSV file mixing valid and invalid orders."""
+        path = tmp_path / "orders.csv"
+        path.write_text("\n".join(CSV_ROWS) + "\n")
+        return path
+
+    @pytest.fixture
+    def mock_enqueue_batch(self, mocker: MagicMock) -> MagicMock:
+        """Mock batched task enqueueing."""
+        return mocker.patch(
+            "app.orders.bulk_import.enqueue_order_batch",
+            side_effect=lambda order_ids: list(order_ids),
+        )
+
+    def test_validate_chunk_matches_schema_rules(self, orders_csv: Path):
+        """Test each row is checked against the API validation rules."""
+        batch = next(read_order_chunks(orders_csv))
+
+        valid, failed_checks = validate_chunk(batch)
+        reasons = {reason: list(mask) for mask, reason in failed_checks}
+
+        assert list(valid) == [True, True, False, False, False, False]
+        assert reasons[
+            "Attribute `limit_price` is required for type `limit`"][2]
+        assert reasons[
+            "Providing a `limit_price` is prohibited for type `market`"][3]
+        assert reasons[
+            "The limit price must be greater than 0 for limit orders."][4]
+        assert reasons["`instrument` should have exactly 12 characters"][4]
+        assert reasons["`quantity` should be an integer greater than 0"][5]
+        assert reasons["Input should be 'market' or 'limit'"][5]
+
+    def test_import_orders_from_csv(
+        self,
+        client,
+        db_session: Session,
+        orders_csv: Path,
+        tmp_path: Path,
+        mock_enqueue_batch: MagicMock,
+    ):
+        """Test valid rows are stored and rejects are written with reasons."""
+        errors_path = tmp_path / "rejects.csv"
+
+        report = import_orders(
+            orders_csv, errors_path, chunk_size=2, enqueue=True,
+            enqueue_batch_size=1, db_engine=get_engine())
+
+        assert report.total == 6
+        assert report.imported == 2
+        assert report.rejected == 4
+        assert report.enqueued == 2
+
+        orders = db_session.query(Order).filter(
+            Order.instrument == "BULKIMPORT01").all()
+        assert {(order.type, order.side) for order in orders} == {
+            (OrderType.LIMIT, OrderSide.BUY),
+            (OrderType.MARKET, OrderSide.SELL),
+        }
+        assert all(order.status == OrderStatus.PENDING for order in orders)
+
+        with open(errors_path, newline="") as errors_file:
+            rejects = list(csv.DictReader(errors_file))
+        assert [row["row_number"] for row in rejects] == ["3", "4", "5", "6"]
+        assert "limit_price" in rejects[0]["reason"]
+
+    def test_read_parquet_chunks(self, tmp_path: Path):
+        """Test typed Parquet columns are read as strings for validation."""
+        path = tmp_path / "orders.parquet"
+        pq.write_table(pa.table({
+            "type": ["limit"],
+            "side": ["buy"],
+            "instrument": ["BULKIMPORT02"],
+            "limit_price": [150.5],
+            "quantity": [100],
+        }), path)
+
+        batch = next(read_order_chunks(path))
+        valid, _ = validate_chunk(batch)
+
+        assert batch.column("quantity").to_pylist() == ["100"]
+        assert list(valid) == [True]
@@ -0,0 +1,121 @@
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.database import ReplicaRouter, get_engine, get_read_session
+
+
+class TestReplicaRouter:
+    """Tests for routing read-only sessions to replicas."""
+
+    @pytest.fixture
+    def router(self, tmp_path: Path) -> ReplicaRouter:
+        """Router with two SQLite files standing in for replicas."""
+        return ReplicaRouter(None, [
+            f"sqlite:///{tmp_path / 'replica_1.db'}",
+            f"sqlite:///{tmp_path / 'replica_2.db'}",
+        ])
+
+    def test_unchecked_replicas_are_not_used(self, router: ReplicaRouter):
+        """Test reads go to the primary until replicas are checked."""
+        assert router.choose() is get_engine()
+
+    def test_round_robin_over_healthy_replicas(self, router: ReplicaRouter):
+        """Test reads alternate between healthy replicas."""
+        router.check_health()
+
+        chosen = [router.choose() for _ in range(4)]
+
+        assert chosen == [
+            router.replicas[0].engine,
+            router.replicas[1].engine,
+            router.replicas[0].engine,
+            router.replicas[1].engine,
+        ]
+
+    def test_unreachable_replica_is_ejected(self, router: ReplicaRouter):
+        """Test a failing replica is skipped until it recovers."""
+        router.measure_lag = MagicMock(
+            side_effect=[OSError("unreachable"), 0.0])
+        router.check_health()
+
+        assert router.replicas[0].ejected_until > time.time()
+        assert {router.choose() for _ in range(4)} == {
+            router.replicas[1].engine}
+
+    def test_ejected_replica_stays_out_for_the_window(
+        self, router: ReplicaRouter
+    ):
+        """Test a healthy check does not cut an ejection short."""
+        router.check_health()
+        router.eject(router.replicas[0], "connection lost")
+
+        router.check_health()
+
+        assert router.replicas[0].ejected_until > time.time()
+        assert {router.choose() for _ in range(4)} == {
+            router.replicas[1].engine}
+
+    def test_disconnected_replica_is_ejected(self, router: ReplicaRouter):
+        """Test a replica with nothing to replay but no WAL stream is out."""
+        engine = MagicMock()
+        engine.dialect.name = "postgresql"
+        connection = engine.connect.return_value.__enter__.return_value
+        connection.execute.return_value.one.return_value = (False, 0)
+        router.replicas[0].engine = engine
+
+        router.check_health()
+
+        assert router.replicas[0].ejected_until > time.time()
+        assert {router.choose() for _ in range(4)} == {
+            router.replicas[1].engine}
+
+    def test_lagging_replica_falls_back_to_primary(
+        self, router: ReplicaRouter
+    ):
+        """Test replicas behind the lag bound are not used."""
+        router.measure_lag = MagicMock(return_value=60.0)
+        router.check_health()
+
+        assert router.choose() is get_engine()
+
+    def test_read_your_writes(self, router: ReplicaRouter):
+        """Test callers who just wrote read from the primary."""
+        router.check_health()
+
+        assert router.choose(last_write_at=time.time() - 60) in {
+            replica.engine for replica in router.replicas}
+        assert router.choose(last_write_at=time.time() + 1) is get_engine()
+
+    def test_read_session_bound_to_chosen_engine(
+        self, router: ReplicaRouter, mocker: MagicMock
+    ):
+        """Test read sessions are bound to the routed engine."""
+        router.check_health()
+        mocker.patch("app.core.database.replica_router", router)
+
+        db = next(get_read_session())
+
+        assert db.get_bind() is router.replicas[0].engine
+
+    def test_write_sets_read_your_writes_cookie(
+        self, client: TestClient, mocker: MagicMock
+    ):
+        """Test creating an order marks the caller as a recent writer."""
+        mocker.patch("app.orders.routers.dedupe_store.exists",
+                     return_value=False)
+        mocker.patch("app.orders.routers.dedupe_store.setex")
+        mocker.patch("app.orders.routers.enqueue_order_processing")
+
+        response = client.post("/orders", json={
+            "type": "market",
+            "side": "buy",
+            "instrument": "stringstring",
+            "quantity": 10,
+        })
+
+        assert response.status_code == 201
+        assert float(response.cookies["last_write_at"]) <= time.time()
@@ -0,0 +1,212 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.embedded_queue import EmbeddedTaskQueue
+from app.orders.dead_letters import count_dead_letters, replay_dead_letters
+from app.orders.exceptions import RedisTaskQueueError
+from app.orders.models import (
+    DeadLetter, Order, OrderSide, OrderStatus, OrderType)
+from app.orders.tasks import (
+    error_class_name, note_order_failure, process_order_task)
+from app.utils.external_service import ExternalServiceError
+
+
+class TestDeadLetters:
+    """Tests for recording, inspecting and replaying failed orders."""
+
+    @pytest.fixture
+    def create_failed_order(self, db_session: Session) -> callable:
+        """Create a FAILED order, optionally with a dead letter."""
+        def _create(error_class: str = None, failed_at: datetime = None):
+            order = Order(
+                type=OrderType.MARKET,
+                side=OrderSide.BUY,
+                instrument="DEADLETTER01",
+                quantity=10,
+                status=OrderStatus.FAILED,
+            )
+            db_session.add(order)
+            db_session.flush()
+            if error_class is not None:
+                db_session.add(DeadLetter(
+                    order_id=order.id,
+                    error_class=error_class,
+                    error_message="Exchange unavailable",
+                    attempts=6,
+                    history=json.dumps([[0, error_class]] * 6),
+                    failed_at=failed_at or datetime.now(),
+                ))
+            db_session.commit()
+            return order
+
+        return _create
+
+    def test_error_class_looks_past_wrapper(
+        self, client, create_failed_order, mocker: MagicMock
+    ):
+        """Test the recorded error class is the processor's root cause."""
+        mocker.patch(
+            "app.orders.tasks.simulate_external_call",
+            side_effect=ExternalServiceError("Connection not available"),
+        )
+        order = create_failed_order()
+
+        with pytest.raises(RuntimeError) as exc_info:
+            process_order_task(order_id=order.id)
+
+        assert error_class_name(exc_info.value) == "ExternalServiceError"
+
+    def test_dead_letter_written_when_retries_exhausted(
+        self, client, create_failed_order, db_session: Session
+    ):
+        """Test attempts are kept in the job and stored on the last one."""
+        order = create_failed_order()
+        job = SimpleNamespace(
+            meta={"order_id": str(order.id)}, should_retry=True)
+        error = RuntimeError("Order failed")
+        error.__cause__ = ExternalServiceError("Connection not available")
+
+        note_order_failure(job, error)
+        assert db_session.get(DeadLetter, order.id) is None
+
+        job.should_retry = False
+        note_order_failure(job, error)
+
+        dead_letter = db_session.get(DeadLetter, order.id)
+        assert dead_letter.error_class == "ExternalServiceError"
+        assert dead_letter.error_message == "Order failed"
+        assert dead_letter.attempts == 2
+        assert [entry[1] for entry in json.loads(dead_letter.history)] == [
+            "ExternalServiceError", "ExternalServiceError"]
+
+    def test_embedded_jobs_report_every_failure(self, tmp_path: Path):
+        """Test the embedded queue calls back after each failed attempt."""
+        failures = []
+
+        async def scenario():
+            queue = EmbeddedTaskQueue(
+                workers=1, state_file=str(tmp_path / "pending.json"))
+            await queue.start()
+            queue.enqueue(
+                MagicMock(side_effect=ValueError("bad")),
+                key="order-1", timeout=5, max_retries=2, retry_interval=0.01,
+                on_failure=lambda job, error: failures.append(
+                    job.should_retry),
+            )
+            await asyncio.sleep(0.3)
+            await queue.stop()
+
+        asyncio.run(scenario())
+
+        assert failures == [True, True, False]
+
+    def test_list_dead_letters_by_error_and_window(
+        self, client: TestClient, create_failed_order
+    ):
+        """Test dead letters can be filtered by error class and time."""
+        now = datetime.now()
+        recent = create_failed_order("ListTimeoutError", now)
+        create_failed_order("ListTimeoutError", now - timedelta(days=2))
+        create_failed_order("ListRejectedError", now)
+
+        response = client.get(
+            "/orders/dead-letters",
+            params={
+                "error_class": "ListTimeoutError",
+                "since": (now - timedelta(hours=1)).isoformat(),
+            },
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 1
+        assert data["dead_letters"][0]["order_id"] == str(recent.id)
+        assert data["dead_letters"][0]["attempts"] == 6
+        assert data["dead_letters"][0]["history"][0] == [0, "ListTimeoutError"]
+
+    def test_dead_letter_stats(self, client, create_failed_order, db_session):
+        """Test dead letters are counted per error class."""
+        create_failed_order("StatsError")
+        create_failed_order("StatsError")
+
+        assert count_dead_letters(db_session)["StatsError"] == 2
+
+    def test_replay_in_throttled_batches(
+        self, client, create_failed_order, db_session: Session,
+        mocker: MagicMock
+    ):
+        """Test replay resets, enqueues and paces orders batch by batch."""
+        mock_enqueue = mocker.patch(
+            "app.orders.dead_letters.enqueue_order_batch")
+        sleep = MagicMock()
+        orders = [create_failed_order("ReplayError") for _ in range(3)]
+
+        replayed = replay_dead_letters(
+            error_class="ReplayError", batch_size=2, rate=1.0, sleep=sleep)
+
+        assert replayed == 3
+        assert [len(c.args[0]) for c in mock_enqueue.call_args_list] == [2, 1]
+        assert sleep.call_count == 2
+        assert sleep.call_args_list[0].args[0] > 1.0
+        for order in orders:
+            db_session.refresh(order)
+            assert order.status == OrderStatus.PENDING
+            assert db_session.get(DeadLetter, order.id) is None
+
+    def test_replay_keeps_partial_fills(
+        self, client, create_failed_order, db_session: Session,
+        mocker: MagicMock
+    ):
+        """Test a partly filled order is replayed as PARTIALLY_FILLED."""
+        mocker.patch("app.orders.dead_letters.enqueue_order_batch")
+        order = create_failed_order("ReplayPartialError")
+        order.filled_quantity = 4
+        db_session.commit()
+
+        replay_dead_letters(error_class="ReplayPartialError", sleep=MagicMock())
+
+        db_session.refresh(order)
+        assert order.status == OrderStatus.PARTIALLY_FILLED
+
+    def test_replay_keeps_dead_letters_when_enqueue_fails(
+        self, client, create_failed_order, db_session: Session,
+        mocker: MagicMock
+    ):
+        """Test a failed enqueue leaves the batch dead-lettered."""
+        mocker.patch(
+            "app.orders.dead_letters.enqueue_order_batch",
+            side_effect=RuntimeError("Redis down"),
+        )
+        order = create_failed_order("ReplayRedisError")
+
+        with pytest.raises(RuntimeError):
+            replay_dead_letters(error_class="ReplayRedisError")
+
+        db_session.expire_all()
+        assert db_session.get(Order, order.id).status == OrderStatus.FAILED
+        assert db_session.get(DeadLetter, order.id) is not None
+
+    def test_replay_is_refused_in_embedded_mode(
+        self, client, create_failed_order, db_session: Session,
+        mocker: MagicMock
+    ):
+        """Test replay leaves dead letters alone when RQ is not in use."""
+        mocker.patch(
+            "app.orders.dead_letters.settings.EXECUTION_MODE", "embedded")
+        mock_enqueue = mocker.patch(
+            "app.orders.dead_letters.enqueue_order_batch")
+        order = create_failed_order("ReplayEmbeddedError")
+
+        with pytest.raises(RedisTaskQueueError, match="embedded"):
+            replay_dead_letters(error_class="ReplayEmbeddedError")
+
+        mock_enqueue.assert_not_called()
+        assert db_session.get(DeadLetter, order.id) is not None
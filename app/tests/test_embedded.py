@@ -0,0 +1,235 @@
+import asyncio
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.core.embedded_queue import EmbeddedQueueError, EmbeddedTaskQueue
+from app.core.redis import InMemoryDedupeStore
+from app.orders.models import Order, OrderSide, OrderStatus, OrderType
+from app.orders.tasks import (
+    enqueue_order_processing, note_order_failure, process_order_task,
+    restore_pending_orders)
+
+JOB_OPTIONS = {"timeout": 5, "max_retries": 2, "retry_interval": 0.01}
+
+
+class TestInMemoryDedupeStore:
+    """Tests for the Redis stand-in used to detect duplicate orders."""
+
+    def test_keys_expire(self, mocker: MagicMock):
+        """Test keys exist until their time to live passes."""
+        clock = mocker.patch(
+            "app.core.redis.time.monotonic", return_value=100.0)
+        store = InMemoryDedupeStore()
+
+        store.setex("order:abc", 5, "processing")
+        assert store.exists("order:abc") == 1
+        assert store.exists("order:other") == 0
+
+        clock.return_value = 105.0
+        assert store.exists("order:abc") == 0
+
+
+class TestEmbeddedTaskQueue:
+    """Tests for the in-process asyncio worker pool."""
+
+    @pytest.fixture
+    def state_file(self, tmp_path: Path) -> Path:
+        """Location for jobs persisted on shutdown."""
+        return tmp_path / "pending.json"
+
+    def test_runs_jobs_from_other_threads(self, state_file: Path):
+        """Test jobs enqueued from a worker thread are executed."""
+        calls = []
+
+        async def scenario():
+            queue = EmbeddedTaskQueue(workers=2, state_file=str(state_file))
+            await queue.start()
+            await asyncio.to_thread(
+                queue.enqueue, calls.append, "order-1", key="order-1",
+                **JOB_OPTIONS)
+            queue.enqueue(calls.append, "order-2", key="order-2",
+                          **JOB_OPTIONS)
+            await queue._queue.join()
+            return await queue.stop()
+
+        assert asyncio.run(scenario()) == []
+        assert sorted(calls) == ["order-1", "order-2"]
+        assert not state_file.exists()
+
+    def test_retries_failed_jobs(self, state_file: Path):
+        """Test a failing job is retried up to the retry limit."""
+        attempts = MagicMock(side_effect=RuntimeError("exchange down"))
+
+        async def scenario():
+            queue = EmbeddedTaskQueue(workers=1, state_file=str(state_file))
+            await queue.start()
+            queue.enqueue(attempts, "order-1", key="order-1", **JOB_OPTIONS)
+            await asyncio.sleep(0.3)
+            await queue.stop()
+
+        asyncio.run(scenario())
+
+        assert attempts.call_count == 3
+
+    def test_timed_out_attempts_never_overlap_retries(self, state_file: Path):
+        """Test a retry waits for the thread of a timed out attempt."""
+        running = []
+        overlaps = []
+
+        def slow_failure(key):
+            overlaps.append(len(running))
+            running.append(key)
+            time.sleep(0.1)
+            running.remove(key)
+            raise RuntimeError("exchange down")
+
+        async def scenario():
+            queue = EmbeddedTaskQueue(workers=2, state_file=str(state_file))
+            await queue.start()
+            queue.enqueue(
+                slow_failure, "order-1", key="order-1",
+                timeout=0.01, max_retries=1, retry_interval=0)
+            await asyncio.sleep(0.4)
+            await queue.stop()
+
+        asyncio.run(scenario())
+
+        assert overlaps == [0, 0]
+
+    def test_full_queue_rejects_jobs(self, state_file: Path):
+        """Test the queue is bounded."""
+        release = threading.Event()
+
+        async def scenario():
+            queue = EmbeddedTaskQueue(
+                workers=1, maxsize=1, state_file=str(state_file))
+            await queue.start()
+            queue.enqueue(release.wait, key="busy", **JOB_OPTIONS)
+            await asyncio.sleep(0.05)
+            queue.enqueue(release.wait, key="waiting", **JOB_OPTIONS)
+            with pytest.raises(EmbeddedQueueError, match="full"):
+                queue.enqueue(release.wait, key="rejected", **JOB_OPTIONS)
+            release.set()
+            await queue.stop()
+
+        asyncio.run(scenario())
+
+    def test_pending_jobs_survive_restart(self, state_file: Path):
+        """Test jobs that did not run are persisted and handed back."""
+        release = threading.Event()
+
+        async def shutdown():
+            queue = EmbeddedTaskQueue(workers=1, state_file=str(state_file))
+            await queue.start()
+            queue.enqueue(release.wait, key="order-1", **JOB_OPTIONS)
+            await asyncio.sleep(0.05)
+            queue.enqueue(release.wait, key="order-2", **JOB_OPTIONS)
+            persisted = await queue.stop(timeout=0.05)
+            # Let the abandoned thread finish so the loop can shut down.
+            release.set()
+            return persisted
+
+        async def restart():
+            queue = EmbeddedTaskQueue(workers=1, state_file=str(state_file))
+            pending = await queue.start()
+            # Kept until the caller has enqueued the jobs again.
+            assert state_file.exists()
+            queue.clear_pending()
+            await queue.stop()
+            return pending
+
+        persisted = asyncio.run(shutdown())
+
+        assert sorted(persisted) == ["order-1", "order-2"]
+        assert sorted(asyncio.run(restart())) == ["order-1", "order-2"]
+        assert not state_file.exists()
+
+    def test_blocking_enqueue_waits_for_room(self, state_file: Path):
+        """Test more jobs than the queue holds can be handed over."""
+        calls = []
+
+        async def scenario():
+            queue = EmbeddedTaskQueue(
+                workers=1, maxsize=2, state_file=str(state_file))
+            await queue.start()
+
+            def enqueue_all():
+                for key in ("order-1", "order-2", "order-3", "order-4"):
+                    queue.enqueue(
+                        calls.append, key, key=key, block=True, **JOB_OPTIONS)
+
+            await asyncio.to_thread(enqueue_all)
+            await queue._queue.join()
+            await queue.stop()
+
+        asyncio.run(scenario())
+
+        assert calls == ["order-1", "order-2", "order-3", "order-4"]
+
+
+class TestEmbeddedOrderProcessing:
+    """Tests for order processing in embedded mode."""
+
+    def test_enqueue_uses_embedded_queue(self, mocker: MagicMock):
+        """Test orders bypass RQ in embedded mode."""
+        mocker.patch("app.orders.tasks.settings.EXECUTION_MODE", "embedded")
+        mock_enqueue = mocker.patch(
+            "app.orders.tasks.embedded_queue.enqueue")
+        mock_queue = mocker.patch("app.orders.tasks.Queue")
+
+        enqueue_order_processing(order_id="order-1")
+
+        mock_enqueue.assert_called_once_with(
+            process_order_task, "order-1", key="order-1", timeout=60,
+            max_retries=5, retry_interval=10,
+            meta={"order_id": "order-1"}, on_failure=note_order_failure,
+            block=False)
+        mock_queue.assert_not_called()
+
+    def test_restore_pending_orders(
+        self, client, db_session: Session, mocker: MagicMock
+    ):
+        """Test restored orders are reset to PENDING and enqueued."""
+        order = Order(
+            type=OrderType.MARKET, side=OrderSide.BUY,
+            instrument="EMBEDDED0001", quantity=1, status=OrderStatus.FAILED)
+        db_session.add(order)
+        db_session.commit()
+        mock_enqueue = mocker.patch(
+            "app.orders.tasks.enqueue_order_processing")
+
+        restore_pending_orders([str(order.id)])
+        db_session.refresh(order)
+
+        assert order.status == OrderStatus.PENDING
+        mock_enqueue.assert_called_once_with(str(order.id), block=True)
+
+    def test_restore_skips_completed_orders(
+        self, client, db_session: Session, mocker: MagicMock
+    ):
+        """Test orders that finished during shutdown are not placed again."""
+        completed = Order(
+            type=OrderType.MARKET, side=OrderSide.BUY,
+            instrument="EMBEDDED0002", quantity=1,
+            status=OrderStatus.COMPLETED)
+        partial = Order(
+            type=OrderType.LIMIT, side=OrderSide.BUY,
+            instrument="EMBEDDED0002", limit_price=1, quantity=10,
+            filled_quantity=4, status=OrderStatus.FAILED)
+        db_session.add_all([completed, partial])
+        db_session.commit()
+        mock_enqueue = mocker.patch(
+            "app.orders.tasks.enqueue_order_processing")
+
+        restore_pending_orders([str(completed.id), str(partial.id)])
+        db_session.refresh(completed)
+        db_session.refresh(partial)
+
+        assert completed.status == OrderStatus.COMPLETED
+        assert partial.status == OrderStatus.PARTIALLY_FILLED
+        mock_enqueue.assert_called_once_with(str(partial.id), block=True)
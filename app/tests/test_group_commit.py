@@ -0,0 +1,147 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.orders.exceptions import DatabaseServiceError
+from app.orders.group_commit import GroupCommitWriter, PendingInsert
+from app.orders.models import Order, OrderStatus
+from app.orders.schemas import CreateOrderSchema
+from app.orders.services import OrderService
+
+
+def make_order_data(quantity: int) -> CreateOrderSchema:
+    """Build a valid market order payload."""
+    return CreateOrderSchema(
+        type="market", side="buy", instrument="GROUPCOMMIT1",
+        quantity=quantity)
+
+
+class TestGroupCommitWriter:
+    """Tests for coalescing order inserts into shared transactions."""
+
+    @pytest.fixture
+    def writer(self) -> GroupCommitWriter:
+        """Writer with a window long enough to collect a whole burst."""
+        writer = GroupCommitWriter(window_ms=200, max_batch=10)
+        yield writer
+        writer.stop()
+
+    def test_concurrent_inserts_share_a_commit(
+        self, client, writer: GroupCommitWriter, db_session: Session, mocker
+    ):
+        """Test a burst of orders is written in a single flush."""
+        flush = mocker.spy(writer, "flush")
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [
+                executor.submit(
+                    lambda q: writer.submit(make_order_data(q)).result(), q)
+                for q in range(1, 6)
+            ]
+            orders = [future.result() for future in futures]
+
+        assert flush.call_count == 1
+        assert [order.quantity for order in orders] == [1, 2, 3, 4, 5]
+        assert len({order.id for order in orders}) == 5
+        for order in orders:
+            stored = db_session.get(Order, order.id)
+            assert stored.quantity == order.quantity
+            assert stored.status == OrderStatus.PENDING
+
+    def test_batches_are_capped(self, client, mocker):
+        """Test no batch exceeds the configured maximum."""
+        writer = GroupCommitWriter(window_ms=200, max_batch=2)
+        flush = mocker.spy(writer, "flush")
+
+        futures = [writer.submit(make_order_data(q)) for q in range(1, 6)]
+        [future.result() for future in futures]
+        writer.stop()
+
+        assert all(len(call.args[0]) <= 2 for call in flush.call_args_list)
+        assert sum(len(call.args[0]) for call in flush.call_args_list) == 5
+
+    def test_failed_commit_rejects_every_caller(self):
+        """Test all callers of a failed batch get a database error."""
+        session = MagicMock()
+        session.scalars.side_effect = RuntimeError("disk full")
+        writer = GroupCommitWriter(
+            session_factory=lambda: session, window_ms=50, max_batch=10)
+
+        futures = [writer.submit(make_order_data(q)) for q in range(1, 3)]
+
+        for future in futures:
+            with pytest.raises(DatabaseServiceError, match="disk full"):
+                future.result()
+        session.rollback.assert_called_once()
+        writer.stop()
+
+    def test_cancelled_inserts_are_not_written(self):
+        """Test orders whose caller timed out are dropped from the batch."""
+        session_factory = MagicMock()
+        writer = GroupCommitWriter(session_factory=session_factory)
+        abandoned = PendingInsert(make_order_data(1))
+        abandoned.future.cancel()
+
+        writer.flush([abandoned])
+
+        session_factory.assert_not_called()
+
+    def test_session_errors_reject_every_caller(self):
+        """Test callers get an error when no session can be opened."""
+        writer = GroupCommitWriter(
+            session_factory=MagicMock(side_effect=RuntimeError("no pool")),
+            window_ms=50, max_batch=10)
+
+        futures = [writer.submit(make_order_data(q)) for q in range(1, 3)]
+
+        for future in futures:
+            with pytest.raises(DatabaseServiceError, match="no pool"):
+                future.result(timeout=5)
+        writer.stop()
+
+    def test_service_stops_waiting_for_a_stuck_write(
+        self, db_session: Session, mocker
+    ):
+        """Test a write in flight is awaited for one more timeout only."""
+        mocker.patch(
+            "app.orders.services.settings.GROUP_COMMIT_TIMEOUT_SECONDS", 0.01)
+        writer = MagicMock()
+        future = Future()
+        future.set_running_or_notify_cancel()
+        writer.submit.return_value = future
+        mocker.patch("app.orders.services.group_commit_writer", writer)
+
+        with pytest.raises(DatabaseServiceError, match="Timed out"):
+            OrderService.create_order_grouped(make_order_data(3))
+
+    def test_service_timeout_withdraws_the_insert(
+        self, db_session: Session, mocker
+    ):
+        """Test a timed out caller cancels its insert before failing."""
+        mocker.patch(
+            "app.orders.services.settings.GROUP_COMMIT_TIMEOUT_SECONDS", 0)
+        writer = MagicMock()
+        future = Future()
+        writer.submit.return_value = future
+        mocker.patch("app.orders.services.group_commit_writer", writer)
+
+        with pytest.raises(DatabaseServiceError, match="Timed out"):
+            OrderService.create_order_grouped(make_order_data(3))
+
+        assert future.cancelled()
+
+    def test_service_uses_group_commit_when_enabled(
+        self, client, db_session: Session, mocker
+    ):
+        """Test OrderService routes inserts through the writer."""
+        mocker.patch(
+            "app.orders.services.settings.GROUP_COMMIT_ENABLED", True)
+        writer = GroupCommitWriter(window_ms=1, max_batch=10)
+        mocker.patch("app.orders.services.group_commit_writer", writer)
+
+        order = OrderService.create_order(db_session, make_order_data(7))
+        writer.stop()
+
+        assert db_session.get(Order, order.id).quantity == 7
@@ -0,0 +1,319 @@
+import asyncio
+import threading
+import time
+import uuid
+from decimal import Decimal
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.core.embedded_queue import embedded_queue
+from app.core.schema import SCHEMA_VERSION, ensure_schema
+from app.orders.models import Order, OrderSide, OrderStatus, OrderType
+from app.main import app, lifespan
+from app.orders.order_book import OrderBook, OrderBookEngine, order_book_engine
+from app.orders.schemas import OrderResponseSchema
+from app.orders.tasks import enqueue_order_processing, process_order_task
+from app.server import main as run_server
+
+BUY, SELL = OrderSide.BUY, OrderSide.SELL
+
+
+class TestOrderBook:
+    """Tests for price-time priority matching within one instrument."""
+
+    @pytest.fixture
+    def book(self) -> OrderBook:
+        """Empty book for a single instrument."""
+        return OrderBook("ORDERBOOK001")
+
+    def test_orders_that_do_not_cross_rest(self, book: OrderBook):
+        """Test a bid below the best ask waits in the book."""
+        book.submit(uuid.uuid4(), SELL, 1010, 5)
+        taker, fills = book.submit(uuid.uuid4(), BUY, 1000, 5)
+
+        assert fills == []
+        assert taker.status == OrderStatus.PENDING
+        assert (book.best_bid(), book.best_ask()) == (1000, 1010)
+        assert len(book) == 2
+
+    def test_price_then_time_priority(self, book: OrderBook):
+        """Test the best price fills first, then the oldest order."""
+        first, second, better = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        book.submit(first, SELL, 1005, 5)
+        book.submit(second, SELL, 1005, 5)
+        book.submit(better, SELL, 1000, 5)
+
+        _, fills = book.submit(uuid.uuid4(), BUY, 1010, 12)
+
+        assert [(f.maker.order_id, f.price, f.quantity) for f in fills] == [
+            (better, 1000, 5), (first, 1005, 5), (second, 1005, 2)]
+        assert book.best_ask() == 1005
+
+    def test_partial_fill_rests_the_remainder(self, book: OrderBook):
+        """Test an incoming order larger than the book keeps its residual."""
+        maker_id = uuid.uuid4()
+        book.submit(maker_id, BUY, 1000, 30)
+
+        taker, fills = book.submit(uuid.uuid4(), SELL, 990, 100)
+
+        assert fills[0].maker.status == OrderStatus.COMPLETED
+        assert (taker.filled, taker.remaining) == (30, 70)
+        assert taker.status == OrderStatus.PARTIALLY_FILLED
+        assert book.best_bid() is None
+        assert book.best_ask() == 990
+
+    def test_expired_orders_leave_the_book(self, book: OrderBook):
+        """Test orders leave in arrival order once their window ends."""
+        old, new = uuid.uuid4(), uuid.uuid4()
+        book.submit(old, BUY, 1000, 5, expires_at=1.0)
+        book.submit(uuid.uuid4(), SELL, 1000, 5, expires_at=1.5)
+        book.submit(new, BUY, 990, 5, expires_at=2.0)
+
+        assert [order.order_id for order in book.expire(1.5)] == []
+        assert [order.order_id for order in book.expire(2.0)] == [new]
+        assert len(book) == 0
+        assert book.cancel(old) is None
+
+    def test_revert_restores_the_makers(self, book: OrderBook):
+        """Test an undone submit leaves the book as it was."""
+        first, second = uuid.uuid4(), uuid.uuid4()
+        book.submit(first, SELL, 1000, 5)
+        book.submit(second, SELL, 1000, 5)
+        taker, fills = book.submit(uuid.uuid4(), BUY, 1000, 20)
+
+        book.revert(taker, fills)
+
+        assert len(book) == 2
+        assert book.best_bid() is None
+        _, fills = book.submit(uuid.uuid4(), BUY, 1000, 7)
+        assert [(f.maker.order_id, f.quantity) for f in fills] == [
+            (first, 5), (second, 2)]
+
+    def test_stale_entries_are_compacted(self, book: OrderBook):
+        """Test removed orders below a live best price are freed."""
+        book.submit(uuid.uuid4(), BUY, 2000, 5)
+        for _ in range(1000):
+            order_id = uuid.uuid4()
+            book.submit(order_id, BUY, 1000, 5)
+            book.cancel(order_id)
+            assert book.best_bid() == 2000
+
+        assert len(book._bids) < 10
+
+
+class TestOrderBookEngine:
+    """Tests for internal matching of persisted orders."""
+
+    @pytest.fixture
+    def create_order(self, db_session: Session) -> callable:
+        """Create a LIMIT order and return its response schema."""
+        def _create(side: OrderSide, price: str, quantity: int):
+            order = Order(
+                type=OrderType.LIMIT,
+                side=side,
+                instrument="ORDERBOOK002",
+                limit_price=Decimal(price),
+                quantity=quantity,
+            )
+            db_session.add(order)
+            db_session.commit()
+            return OrderResponseSchema.model_validate(order)
+
+        return _create
+
+    def test_crossing_orders_are_filled_internally(
+        self, client, create_order, db_session: Session
+    ):
+        """Test fills are recorded and only the residual is routed out."""
+        route = MagicMock()
+        engine = OrderBookEngine(route=route, rest_ms=60_000)
+        sell = create_order(SELL, "10.00", 100)
+        buy = create_order(BUY, "10.50", 40)
+
+        assert engine.submit(sell).status == OrderStatus.PENDING
+        matched = engine.submit(buy)
+
+        assert matched.status == OrderStatus.COMPLETED
+        assert matched.filled_quantity == 40
+        resting = db_session.get(Order, sell.id)
+        db_session.refresh(resting)
+        assert resting.status == OrderStatus.PARTIALLY_FILLED
+        assert resting.filled_quantity == 40
+        route.assert_not_called()
+
+        engine.stop()
+
+        route.assert_called_once_with(str(sell.id))
+
+    def test_failed_fill_write_leaves_the_book_unchanged(
+        self, client, create_order
+    ):
+        """Test makers stay restable when their fills were not recorded."""
+        session = MagicMock()
+        session.execute.side_effect = RuntimeError("database down")
+        route = MagicMock()
+        engine = OrderBookEngine(
+            session_factory=lambda: session, route=route, rest_ms=60_000)
+        sell = create_order(SELL, "10.00", 10)
+        engine.submit(sell)
+        buy = create_order(BUY, "10.00", 10)
+
+        unmatched = engine.submit(buy)
+
+        assert unmatched.status == OrderStatus.PENDING
+        assert unmatched.filled_quantity == 0
+        route.assert_called_once_with(str(buy.id))
+        book = engine.books["ORDERBOOK002"]
+        assert len(book) == 1
+        assert book.best_ask() == 1000
+        engine.stop()
+        route.assert_called_with(str(sell.id))
+
+    def test_shutdown_in_embedded_mode(
+        self, client, create_order, db_session: Session, mocker: MagicMock,
+        tmp_path: Path
+    ):
+        """Test shutdown completes while the expiry thread is routing."""
+        mocker.patch("app.main.settings.EXECUTION_MODE", "embedded")
+        mocker.patch("app.main.settings.ORDER_BOOK_ENABLED", True)
+        state_file = tmp_path / "pending.json"
+        mocker.patch.object(embedded_queue, "state_file", state_file)
+        mocker.patch("app.orders.tasks.simulate_external_call")
+        mocker.patch.object(order_book_engine, "rest", 0)
+        routing = threading.Event()
+
+        def slow_route(order_id: str) -> None:
+            routing.set()
+            # Lets shutdown begin while this thread is still routing.
+            time.sleep(0.1)
+            enqueue_order_processing(order_id)
+
+        mocker.patch.object(order_book_engine, "route", slow_route)
+        order = create_order(BUY, "9.00", 10)
+
+        async def serve_and_stop():
+            async with lifespan(app):
+                order_book_engine.submit(order)
+                await asyncio.to_thread(routing.wait, 5)
+
+        server = threading.Thread(
+            target=asyncio.run, args=(serve_and_stop(),), daemon=True)
+        server.start()
+        server.join(10)
+
+        assert not server.is_alive()
+        stored = db_session.get(Order, order.id)
+        db_session.refresh(stored)
+        assert (stored.status == OrderStatus.COMPLETED
+                or str(order.id) in state_file.read_text())
+
+    def test_unrouted_orders_are_retried(self, create_order, client):
+        """Test orders that could not be routed are kept for next time."""
+        route = MagicMock(side_effect=[RuntimeError("Redis down"), None])
+        engine = OrderBookEngine(route=route, rest_ms=0)
+        order = create_order(BUY, "9.00", 10)
+        engine.submit(order)
+
+        engine.release_expired()
+        engine.release_expired()
+
+        assert route.call_count == 2
+        route.assert_called_with(str(order.id))
+
+    def test_processor_routes_only_the_residual(
+        self, client, db_session: Session, mocker: MagicMock
+    ):
+        """Test a partially filled order sends its open quantity out."""
+        mock_external = mocker.patch("app.orders.tasks.simulate_external_call")
+        order = Order(
+            type=OrderType.LIMIT,
+            side=BUY,
+            instrument="ORDERBOOK003",
+            limit_price=Decimal("10.00"),
+            quantity=100,
+            filled_quantity=40,
+            status=OrderStatus.PARTIALLY_FILLED,
+        )
+        db_session.add(order)
+        db_session.commit()
+
+        process_order_task(order_id=order.id)
+
+        assert mock_external.call_args.args[0].quantity == 60
+        db_session.refresh(order)
+        assert order.status == OrderStatus.COMPLETED
+        assert order.filled_quantity == 100
+
+    def test_limit_orders_go_through_the_book(
+        self, client, mocker: MagicMock
+    ):
+        """Test the API matches LIMIT orders instead of enqueueing them."""
+        mocker.patch("app.orders.routers.settings.ORDER_BOOK_ENABLED", True)
+        mocker.patch("app.orders.routers.dedupe_store.exists",
+                     return_value=False)
+        mocker.patch("app.orders.routers.dedupe_store.setex")
+        mock_enqueue = mocker.patch(
+            "app.orders.routers.enqueue_order_processing")
+        mock_submit = mocker.patch(
+            "app.orders.routers.order_book_engine.submit",
+            side_effect=lambda order: order.model_copy(update={
+                "status": OrderStatus.COMPLETED,
+                "filled_quantity": order.quantity,
+            }),
+        )
+
+        response = client.post("/orders", json={
+            "type": "limit", "side": "buy", "instrument": "ORDERBOOK004",
+            "limit_price": 10, "quantity": 5,
+        })
+
+        assert response.status_code == 201
+        assert response.json()["status"] == "completed"
+        assert response.json()["filled_quantity"] == 5
+        mock_submit.assert_called_once()
+        mock_enqueue.assert_not_called()
+
+    def test_launcher_keeps_the_book_single_process(self, mocker: MagicMock):
+        """Test the book refuses to be split across several workers."""
+        mocker.patch("app.server.settings.ORDER_BOOK_ENABLED", True)
+        mock_run = mocker.patch("app.server.uvicorn.run")
+
+        with pytest.raises(SystemExit):
+            run_server(["--workers", "2"])
+        mock_run.assert_not_called()
+
+
+class TestPartialFillMigration:
+    """Tests for upgrading databases created before partial fills."""
+
+    def test_legacy_database_gains_filled_quantity(self, tmp_path: Path):
+        """Test an unversioned orders table is migrated in place."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+        with engine.begin() as connection:
+            connection.execute(text(
+                "CREATE TABLE orders (id CHAR(32) PRIMARY KEY, "
+                "quantity INTEGER, status VARCHAR(9))"))
+            connection.execute(text(
+                "INSERT INTO orders VALUES ('a', 5, 'PENDING')"))
+
+        assert ensure_schema(engine) == SCHEMA_VERSION
+
+        columns = {
+            column["name"] for column in inspect(engine).get_columns("orders")}
+        assert "filled_quantity" in columns
+        with engine.connect() as connection:
+            assert connection.scalar(
+                text("SELECT filled_quantity FROM orders")) == 0
+
+    def test_unversioned_current_database_is_left_as_is(self, tmp_path: Path):
+        """Test tables created from the current models are not altered."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'current.db'}")
+        Base.metadata.create_all(bind=engine)
+
+        assert ensure_schema(engine) == SCHEMA_VERSION
+        assert ensure_schema(engine) == SCHEMA_VERSION
@@ -22,13 +22,13 @@ class TestOrderCreationWithBackgroundTask:
 
     @pytest.fixture
     def mock_redis_exists(self, mocker: MagicMock) -> Any:
-        """Mock redis_client.exists method."""
-        return mocker.patch("app.orders.routers.redis_client.exists")
+        """Mock dedupe_store.exists method."""
+        return mocker.patch("app.orders.routers.dedupe_store.exists")
 
     @pytest.fixture
     def mock_redis_set(self, mocker: MagicMock) -> Any:
-        """Mock redis_client.exists method."""
-        return mocker.patch("app.orders.routers.redis_client.setex")
+        """Mock dedupe_store.exists method."""
+        return mocker.patch("app.orders.routers.dedupe_store.setex")
 
     def test_create_limit_order(
         self,
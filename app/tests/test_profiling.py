@@ -0,0 +1,95 @@
+import json
+import pstats
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.utils.profiling import (
+    profile_job, sign_profile_request, verify_profile_token)
+
+
+class TestProfiling:
+    """Tests for opt-in profiling and slow-request capture."""
+
+    @pytest.fixture
+    def profiling_settings(self, mocker: MagicMock, tmp_path: Path) -> Path:
+        """Enable profiling with artifacts written to a temporary dir."""
+        mocker.patch(
+            "app.utils.profiling.settings.PROFILING_SECRET", "secret")
+        mocker.patch(
+            "app.utils.profiling.settings.PROFILING_OUTPUT_DIR",
+            str(tmp_path))
+        return tmp_path
+
+    def test_profile_token_signature(self, profiling_settings: Path):
+        """Test only tokens signed for the same request are accepted."""
+        token = sign_profile_request("GET", "/orders")
+
+        assert verify_profile_token(token, "GET", "/orders")
+        assert not verify_profile_token(token, "POST", "/orders")
+        assert not verify_profile_token(token + "0", "GET", "/orders")
+        assert not verify_profile_token("", "GET", "/orders")
+
+    def test_expired_profile_token(self, profiling_settings: Path, mocker):
+        """Test expired tokens are rejected."""
+        token = sign_profile_request("GET", "/orders", ttl=10)
+        mocker.patch(
+            "app.utils.profiling.time.time", return_value=time.time() + 60)
+
+        assert not verify_profile_token(token, "GET", "/orders")
+
+    def test_signed_request_is_profiled(
+        self, client: TestClient, profiling_settings: Path
+    ):
+        """Test a request with a valid header dumps a cProfile file."""
+        response = client.get(
+            "/orders",
+            headers={"X-Profile-Token": sign_profile_request("GET", "/orders")},
+        )
+
+        assert response.status_code == 200
+        [profile_path] = profiling_settings.glob("*.prof")
+        assert pstats.Stats(str(profile_path)).total_calls > 0
+
+    def test_unsigned_request_is_not_profiled(
+        self, client: TestClient, profiling_settings: Path
+    ):
+        """Test requests without the header are left alone."""
+        client.get("/orders")
+
+        assert list(profiling_settings.iterdir()) == []
+
+    def test_slow_request_breakdown(
+        self, client: TestClient, profiling_settings: Path, mocker
+    ):
+        """Test slow requests record SQL statements and timings."""
+        mocker.patch(
+            "app.utils.profiling.settings.SLOW_REQUEST_THRESHOLD_MS", 0.001)
+
+        client.get("/orders")
+
+        [record_path] = profiling_settings.glob("*.json")
+        record = json.loads(record_path.read_text())
+        assert record["name"] == "GET /orders"
+        assert record["total_ms"] > 0
+        assert "endpoint" in record["sections_ms"]
+        assert "serialization" in record["sections_ms"]
+        assert any(
+            "FROM orders" in query["statement"] for query in record["sql"])
+
+    def test_profile_job_records_slow_job(
+        self, profiling_settings: Path, mocker
+    ):
+        """Test the worker hook records jobs over the threshold."""
+        mocker.patch(
+            "app.utils.profiling.settings.SLOW_REQUEST_THRESHOLD_MS", 0.001)
+
+        with profile_job("process_order_task 1") as profile:
+            time.sleep(0.01)
+
+        assert profile is not None
+        [record_path] = profiling_settings.glob("*.json")
+        assert json.loads(record_path.read_text())["total_ms"] >= 10
@@ -0,0 +1,173 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, call
+
+import pytest
+
+from app.orders.retention import (
+    JobSweeper, memory_report, read_summary, record_finished_job,
+    summary_key, sweep_orphaned_keys)
+from app.orders.tasks import enqueue_order_processing, on_order_job_success
+
+
+class TestJobRetention:
+    """Tests for bounding the job metadata kept in Redis."""
+
+    @pytest.fixture
+    def redis(self) -> MagicMock:
+        """Mock Redis client whose pipelines share one mock."""
+        redis = MagicMock()
+        redis.pipeline.return_value = MagicMock()
+        return redis
+
+    def test_enqueue_uses_configured_retention(self, mocker: MagicMock):
+        """Test jobs are enqueued with the configured result TTLs."""
+        mocker.patch("app.orders.tasks.settings.JOB_RESULT_TTL_SECONDS", 0)
+        mocker.patch("app.orders.tasks.settings.JOB_FAILURE_TTL_SECONDS", 600)
+        mock_queue = mocker.patch("app.orders.tasks.Queue")
+
+        enqueue_order_processing(order_id="order-1")
+
+        options = mock_queue.return_value.enqueue.call_args.kwargs
+        assert options["result_ttl"] == 0
+        assert options["failure_ttl"] == 600
+        assert options["on_success"] is not None
+
+    def test_finished_jobs_are_summarised(self, redis: MagicMock):
+        """Test a finished job is folded into per-type counters."""
+        job = SimpleNamespace(
+            description="app.orders.tasks.process_order_task('order-1')",
+            started_at=datetime.now(timezone.utc) - timedelta(seconds=2),
+            meta={"failures": [[0, "ExternalServiceError"]]},
+        )
+
+        record_finished_job(redis, job, "succeeded")
+
+        pipeline = redis.pipeline.return_value
+        counters = {
+            c.args[1]: c.args[2] for c in pipeline.hincrby.call_args_list}
+        assert counters["process_order_task:succeeded:count"] == 1
+        assert counters["process_order_task:succeeded:attempts"] == 2
+        assert counters["process_order_task:succeeded:duration_ms"] >= 2000
+        pipeline.expire.assert_called_once()
+        pipeline.execute.assert_called_once()
+
+    def test_summary_errors_never_fail_the_job(self, redis: MagicMock):
+        """Test a Redis error while summarising leaves the job succeeded."""
+        redis.pipeline.return_value.execute.side_effect = ConnectionError(
+            "Connection refused")
+        job = SimpleNamespace(
+            id="job-1",
+            description="app.orders.tasks.process_order_task('order-1')",
+            started_at=None,
+            meta={},
+        )
+
+        on_order_job_success(job, redis, None)
+        record_finished_job(redis, job, "failed")
+
+        assert redis.pipeline.return_value.execute.call_count == 2
+
+    def test_read_summary_adds_up_buckets(
+        self, redis: MagicMock, mocker: MagicMock
+    ):
+        """Test counters from every bucket in the window are added up."""
+        mocker.patch(
+            "app.orders.retention.settings.JOB_SUMMARY_BUCKET_SECONDS", 60)
+        redis.pipeline.return_value.execute.return_value = [
+            {b"process_order_task:succeeded:count": b"3"},
+            {b"process_order_task:succeeded:count": b"2",
+             b"process_order_task:failed:count": b"1"},
+        ]
+
+        totals = read_summary(redis, 60)
+
+        assert totals["process_order_task:succeeded"]["count"] == 5
+        assert totals["process_order_task:failed"]["count"] == 1
+        assert redis.pipeline.return_value.hgetall.call_count == 2
+
+    def test_summary_keys_are_bucketed(self, mocker: MagicMock):
+        """Test timestamps in the same bucket share a summary key."""
+        mocker.patch(
+            "app.orders.retention.settings.JOB_SUMMARY_BUCKET_SECONDS", 60)
+
+        assert summary_key(120) == summary_key(179) != summary_key(180)
+
+    def test_sweeper_deletes_orphaned_keys(self, redis: MagicMock):
+        """Test only leaked job hashes and dangling side keys are deleted."""
+        redis.scan_iter.side_effect = [
+            [b"rq:job:live", b"rq:job:leaked", b"rq:job:partial"],
+            [b"rq:results:live", b"rq:results:gone"],
+        ]
+        redis.pipeline.return_value.execute.side_effect = [
+            [300, b"finished", -1, b"finished", -1, None],
+            [300, 1, -1, 0],
+        ]
+        redis.unlink.side_effect = [2, 1]
+
+        report = sweep_orphaned_keys(redis)
+
+        assert redis.unlink.call_args_list == [
+            call(b"rq:job:leaked", b"rq:job:partial"),
+            call(b"rq:results:gone"),
+        ]
+        assert report.scanned == 5
+        assert report.deleted == 3
+
+    def test_keys_are_scanned_lazily(
+        self, redis: MagicMock, mocker: MagicMock
+    ):
+        """Test chunks are processed before the scan has finished."""
+        mocker.patch("app.orders.retention.SCAN_BATCH_SIZE", 2)
+        scanned = []
+
+        def scan_iter(**kwargs):
+            for index in range(5):
+                scanned.append(index)
+                yield f"key:{index}".encode()
+
+        redis.scan_iter.side_effect = scan_iter
+        scanned_per_pipeline = []
+
+        def execute():
+            scanned_per_pipeline.append(len(scanned))
+            return [1, 1] if len(scanned) < 5 else [1]
+
+        redis.pipeline.return_value.execute.side_effect = execute
+
+        memory_report(redis)
+
+        assert scanned_per_pipeline == [2, 4, 5]
+
+    def test_memory_report_groups_by_job_type(self, redis: MagicMock):
+        """Test job hashes are measured per job type and status."""
+        redis.scan_iter.return_value = [
+            b"rq:job:a", b"rq:job:b", b"rq:results:a", b"ratelimit:client"]
+        redis.pipeline.return_value.execute.return_value = [
+            400, [b"app.orders.tasks.process_order_task('a')", b"finished"],
+            600, [b"app.orders.tasks.process_order_task('b')", b"finished"],
+            250,
+            90,
+        ]
+
+        report = memory_report(redis)
+
+        assert report["job process_order_task [finished]"] == {
+            "keys": 2, "bytes": 1000}
+        assert report["rq:results"] == {"keys": 1, "bytes": 250}
+        assert report["ratelimit:client"] == {"keys": 1, "bytes": 90}
+
+    def test_sweep_runs_once_per_interval(
+        self, redis: MagicMock, mocker: MagicMock
+    ):
+        """Test the sweep lock keeps other processes from sweeping."""
+        mock_sweep = mocker.patch.object(JobSweeper, "sweep")
+        sweeper = JobSweeper(redis)
+
+        redis.set.return_value = None
+        assert sweeper.sweep_if_due() is None
+        mock_sweep.assert_not_called()
+
+        redis.set.return_value = True
+        sweeper.sweep_if_due()
+        mock_sweep.assert_called_once()
@@ -0,0 +1,104 @@
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import Engine
+
+from app.core import schema
+from app.core.database import (
+    _after_fork_in_child, engine_options, get_engine)
+from app.core.schema import SchemaVersion, ensure_schema
+from app.orders import models  # noqa: F401
+from app.server import main as run_server, worker_count
+
+
+class TestStartup:
+    """Tests for lazy engines, the schema check and the launcher."""
+
+    @pytest.fixture
+    def fresh_engine(self, tmp_path: Path) -> Engine:
+        """Engine on an empty SQLite database."""
+        return create_engine(f"sqlite:///{tmp_path / 'startup.db'}")
+
+    def test_schema_created_once(
+        self, fresh_engine: Engine, mocker: MagicMock
+    ):
+        """Test a fresh database is created and later boots only check."""
+        assert ensure_schema(fresh_engine) == schema.SCHEMA_VERSION
+        assert {"orders", "dead_letters", "schema_version"} <= set(
+            inspect(fresh_engine).get_table_names())
+
+        mock_create_all = mocker.patch.object(
+            schema.Base.metadata, "create_all")
+        assert ensure_schema(fresh_engine) == schema.SCHEMA_VERSION
+        mock_create_all.assert_not_called()
+
+    def test_pending_migrations_are_applied(
+        self, fresh_engine: Engine, mocker: MagicMock
+    ):
+        """Test an older database runs each missing migration in order."""
+        ensure_schema(fresh_engine)
+        migration = MagicMock()
+        mocker.patch.object(
+            schema, "SCHEMA_VERSION", schema.SCHEMA_VERSION + 1)
+        mocker.patch.dict(
+            schema.MIGRATIONS, {schema.SCHEMA_VERSION: migration})
+
+        assert ensure_schema(fresh_engine) == schema.SCHEMA_VERSION
+
+        migration.assert_called_once()
+        with fresh_engine.connect() as connection:
+            assert connection.scalar(
+                SchemaVersion.__table__.select().with_only_columns(
+                    SchemaVersion.version)) == schema.SCHEMA_VERSION
+
+    def test_pool_options_from_settings(self, mocker: MagicMock):
+        """Test pool sizing applies to server databases only."""
+        mocker.patch("app.core.database.settings.DATABASE_POOL_SIZE", 20)
+
+        postgres = engine_options("postgresql://user@db/orders")
+        sqlite = engine_options("sqlite:///orders.db")
+
+        assert postgres["pool_size"] == 20
+        assert postgres["pool_pre_ping"] is True
+        assert "pool_size" not in sqlite
+
+    def test_forked_child_gets_its_own_pool(self):
+        """Test the fork hook replaces inherited connection pools."""
+        engine = get_engine()
+        inherited_pool = engine.pool
+
+        _after_fork_in_child()
+
+        assert get_engine() is engine
+        assert engine.pool is not inherited_pool
+
+    def test_worker_count(self, mocker: MagicMock):
+        """Test workers come from the flag, the settings or the CPUs."""
+        mocker.patch("app.server.settings.WEB_CONCURRENCY", 0)
+        mocker.patch("app.server.os.cpu_count", return_value=8)
+
+        assert worker_count(3) == 3
+        assert worker_count() == 8
+
+    def test_launcher_migrates_then_serves(self, mocker: MagicMock):
+        """Test the launcher checks the schema once before forking."""
+        mock_ensure = mocker.patch("app.server.ensure_schema", return_value=1)
+        mock_run = mocker.patch("app.server.uvicorn.run")
+
+        run_server(["--workers", "4"])
+
+        mock_ensure.assert_called_once()
+        assert mock_run.call_args.kwargs["workers"] == 4
+
+    def test_launcher_keeps_embedded_mode_single_process(
+        self, mocker: MagicMock
+    ):
+        """Test embedded mode refuses to start several workers."""
+        mocker.patch("app.server.settings.EXECUTION_MODE", "embedded")
+        mock_run = mocker.patch("app.server.uvicorn.run")
+
+        with pytest.raises(SystemExit):
+            run_server(["--workers", "2"])
+        mock_run.assert_not_called()
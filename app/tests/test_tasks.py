@@ -6,11 +6,27 @@ from sqlalchemy.orm import Session
 from pydantic import ValidationError
 
 from app.orders.models import Order, OrderType, OrderSide, OrderStatus
-from app.orders.tasks import process_order_task
+from app.orders.schemas import OrderResponseSchema
+from app.orders.snapshot import (
+    SnapshotError, decode_order_snapshot, encode_order_snapshot)
+from app.orders.tasks import (
+    enqueue_order_processing, process_order_snapshot_task, process_order_task)
 from app.utils.external_service import ExternalServiceError
 from app.orders.exceptions import OrderNotFoundError
 
 
+@pytest.fixture
+def create_test_order(db_session: Session) -> callable:
+    """Create and return a test order."""
+    def _create_order(order_data: dict) -> Order:
+        order = Order(**order_data)
+        db_session.add(order)
+        db_session.commit()
+        return order
+
+    return _create_order
+
+
 class TestOrderProcessor:
     """Tests for processing orders."""
 
@@ -24,17 +40,6 @@ class TestOrderProcessor:
             ),
         )
 
-    @pytest.fixture
-    def create_test_order(self, db_session: Session) -> callable:
-        """Create and return a test order."""
-        def _create_order(order_data: dict) -> Order:
-            order = Order(**order_data)
-            db_session.add(order)
-            db_session.commit()
-            return order
-
-        return _create_order
-
     def test_process_order_success(
             self,
             client,
@@ -97,3 +102,127 @@ class TestOrderProcessor:
 
         with pytest.raises(OrderNotFoundError, match="not found."):
             process_order_task(order_id=invalid_uuid)
+
+
+class TestOrderSnapshot:
+    """Tests for processing orders from enqueued snapshots."""
+
+    @pytest.fixture
+    def limit_order_data(self) -> dict:
+        """Data for a pending limit order."""
+        return {
+            "instrument": "stringstring",
+            "quantity": 100,
+            "type": OrderType.LIMIT,
+            "side": OrderSide.SELL,
+            "limit_price": 150.25,
+        }
+
+    def test_snapshot_round_trip(
+        self, client, create_test_order, limit_order_data
+    ):
+        """Test a snapshot decodes to the order it was built from."""
+        order = OrderResponseSchema.model_validate(
+            create_test_order(limit_order_data))
+
+        payload = encode_order_snapshot(order)
+
+        assert len(payload) < 100
+        assert decode_order_snapshot(payload) == order
+
+    def test_snapshot_without_limit_price(self, client, create_test_order):
+        """Test market orders keep an empty limit price."""
+        order = OrderResponseSchema.model_validate(create_test_order({
+            "instrument": "AAPL",
+            "quantity": 10,
+            "type": OrderType.MARKET,
+            "side": OrderSide.BUY,
+        }))
+
+        decoded = decode_order_snapshot(encode_order_snapshot(order))
+
+        assert decoded.limit_price is None
+        assert decoded.instrument == "AAPL"
+
+    def test_snapshot_keeps_filled_quantity(
+        self, client, create_test_order, limit_order_data, mocker
+    ):
+        """Test a partly filled order routes only its residual."""
+        order = OrderResponseSchema.model_validate(create_test_order({
+            **limit_order_data,
+            "filled_quantity": 40,
+            "status": OrderStatus.PARTIALLY_FILLED,
+        }))
+        mock_external = mocker.patch("app.orders.tasks.simulate_external_call")
+
+        process_order_snapshot_task(encode_order_snapshot(order))
+
+        assert mock_external.call_args.args[0].quantity == 60
+
+    def test_version_1_snapshot_is_still_read(
+        self, client, create_test_order, limit_order_data
+    ):
+        """Test jobs enqueued before the upgrade decode as unfilled."""
+        order = OrderResponseSchema.model_validate(
+            create_test_order(limit_order_data))
+        payload = b"\x01" + encode_order_snapshot(order)[1:-8]
+
+        assert decode_order_snapshot(payload) == order
+
+    def test_snapshot_unknown_version(self):
+        """Test snapshots of an unknown version are rejected."""
+        with pytest.raises(SnapshotError, match="version"):
+            decode_order_snapshot(b"\x09")
+
+    def test_process_snapshot_skips_fetch(
+        self, client, create_test_order, limit_order_data, db_session, mocker
+    ):
+        """Test a snapshot job completes the order without reading it."""
+        test_order = create_test_order(limit_order_data)
+        payload = encode_order_snapshot(
+            OrderResponseSchema.model_validate(test_order))
+        mocker.patch("app.orders.tasks.simulate_external_call")
+        mock_fetch = mocker.patch(
+            "app.orders.tasks.OrderProcessor.fetch_order")
+
+        process_order_snapshot_task(payload)
+        db_session.refresh(test_order)
+
+        assert test_order.status == OrderStatus.COMPLETED
+        mock_fetch.assert_not_called()
+
+    def test_stale_snapshot_keeps_completed_status(
+        self, client, create_test_order, limit_order_data, db_session, mocker
+    ):
+        """Test a stale snapshot cannot overwrite a completed order."""
+        test_order = create_test_order(limit_order_data)
+        payload = encode_order_snapshot(
+            OrderResponseSchema.model_validate(test_order))
+        test_order.status = OrderStatus.COMPLETED
+        db_session.commit()
+        mocker.patch(
+            "app.orders.tasks.simulate_external_call",
+            side_effect=ExternalServiceError("Connection not available"),
+        )
+
+        with pytest.raises(RuntimeError, match="Connection not available"):
+            process_order_snapshot_task(payload)
+        db_session.refresh(test_order)
+
+        assert test_order.status == OrderStatus.COMPLETED
+
+    def test_enqueue_uses_snapshot_when_enabled(
+        self, client, create_test_order, limit_order_data, mocker
+    ):
+        """Test the snapshot task is enqueued when the option is on."""
+        order = OrderResponseSchema.model_validate(
+            create_test_order(limit_order_data))
+        mocker.patch(
+            "app.orders.tasks.settings.ORDER_SNAPSHOT_PAYLOADS", True)
+        mock_queue = mocker.patch("app.orders.tasks.Queue")
+
+        enqueue_order_processing(order_id=order.id, order=order)
+
+        task, payload = mock_queue.return_value.enqueue.call_args.args
+        assert task is process_order_snapshot_task
+        assert decode_order_snapshot(payload) == order
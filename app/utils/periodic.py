@@ -0,0 +1,47 @@
+import threading
+from typing import Callable, Optional
+
+from app.utils.logger import logger_config
+
+logger = logger_config("app.utils.periodic")
+
+
+class PeriodicWorker:
+    """Runs a callable on a daemon thread at a fixed interval."""
+
+    def __init__(self, name: str, interval: float, target: Callable[[], None]) -> None:
+        self.name = name
+        self.interval = interval
+        self.target = target
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the background thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Starts the background thread if it is not already running."""
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Signals the background thread to stop and waits for it."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        """Invokes the target until stopped, never letting it raise."""
+        while not self._stop_event.is_set():
+            try:
+                self.target()
+            except Exception as e:
+                logger.warning(f"Periodic task {self.name} failed: {str(e)}")
+            self._stop_event.wait(self.interval)
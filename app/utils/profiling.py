@@ -0,0 +1,275 @@
+import cProfile
+import functools
+import hashlib
+import hmac
+import inspect
+import json
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.utils.logger import logger_config
+
+logger = logger_config("app.utils.profiling")
+
+PROFILE_HEADER = "x-profile-token"
+QUERY_STARTED_KEY = "profiling_query_started"
+MAX_RECORDED_STATEMENT_LENGTH = 500
+
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar(
+    "current_profile", default=None)
+
+
+class RequestProfile:
+    """Timings captured while serving one request or running one job."""
+
+    def __init__(self, name: str, capture_profile: bool = False) -> None:
+        self.name = name
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.profiler = cProfile.Profile() if capture_profile else None
+        self.sections: Dict[str, float] = {}
+        self.sql: List[Tuple[str, float]] = []
+        self.redis: List[Tuple[str, float]] = []
+        self.endpoint_finished: Optional[float] = None
+        self.total = 0.0
+
+    @contextmanager
+    def section(self, name: str) -> Iterator[None]:
+        """Adds the time spent inside the block to a named section."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections[name] = (
+                self.sections.get(name, 0.0) + time.perf_counter() - started)
+
+    def run(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Calls `func`, under cProfile when this profile captures one."""
+        if self.profiler is None:
+            return func(*args, **kwargs)
+        return self.profiler.runcall(func, *args, **kwargs)
+
+    def record_sql(self, statement: str, duration: float) -> None:
+        """Records one SQL statement and how long it took."""
+        self.sql.append((statement[:MAX_RECORDED_STATEMENT_LENGTH], duration))
+
+    def record_redis(self, command: str, duration: float) -> None:
+        """Records one Redis command and how long it took."""
+        self.redis.append((command, duration))
+
+    def breakdown(self) -> Dict[str, Any]:
+        """Summarises where the time went, in milliseconds."""
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "total_ms": round(self.total * 1000, 3),
+            "sections_ms": {
+                name: round(duration * 1000, 3)
+                for name, duration in self.sections.items()
+            },
+            "sql_ms": round(sum(d for _, d in self.sql) * 1000, 3),
+            "redis_ms": round(sum(d for _, d in self.redis) * 1000, 3),
+            "sql": [
+                {"statement": statement, "duration_ms": round(d * 1000, 3)}
+                for statement, d in self.sql
+            ],
+            "redis": [
+                {"command": command, "duration_ms": round(d * 1000, 3)}
+                for command, d in self.redis
+            ],
+        }
+
+    def finish(self) -> None:
+        """Stops the clock and writes out the profile or slow record."""
+        self.total = time.perf_counter() - self.started
+        try:
+            self._write_artifacts()
+        except Exception as e:
+            logger.error(f"Could not write profile for {self.name}: {str(e)}")
+
+    def _write_artifacts(self) -> None:
+        """Dumps the cProfile stats and the slow-request record."""
+        threshold = settings.SLOW_REQUEST_THRESHOLD_MS
+
+        if self.profiler is not None:
+            path = _output_path(self.name, self.started_at, "prof")
+            self.profiler.dump_stats(path)
+            logger.info(f"Profile for {self.name} written to {path}.")
+
+        if threshold > 0 and self.total * 1000 >= threshold:
+            record = self.breakdown()
+            path = _output_path(self.name, self.started_at, "json")
+            path.write_text(json.dumps(record, indent=2))
+            logger.warning(
+                f"Slow request {self.name}: {record['total_ms']}ms "
+                f"(sql {record['sql_ms']}ms in {len(self.sql)} statements, "
+                f"redis {record['redis_ms']}ms in {len(self.redis)} commands,"
+                f" sections {record['sections_ms']}). Details in {path}.")
+
+
+def _output_path(name: str, started_at: float, suffix: str) -> Path:
+    """Builds a unique file name for a profile artifact."""
+    output_dir = Path(settings.PROFILING_OUTPUT_DIR)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", name).strip("-")[:80]
+    return output_dir / f"{int(started_at * 1000)}-{slug}.{suffix}"
+
+
+def current_profile() -> Optional[RequestProfile]:
+    """Returns the profile of the request or job being served, if any."""
+    return _current_profile.get()
+
+
+def profiling_active() -> bool:
+    """Whether any request or job may need to be profiled or recorded."""
+    return bool(
+        settings.PROFILING_SECRET
+        or settings.PROFILING_SAMPLE_RATE > 0
+        or settings.SLOW_REQUEST_THRESHOLD_MS > 0
+    )
+
+
+def sign_profile_request(method: str, path: str, ttl: int = 300) -> str:
+    """Creates a value for the profiling header valid for `ttl` seconds."""
+    expires = int(time.time()) + ttl
+    signature = hmac.new(
+        settings.PROFILING_SECRET.encode(),
+        f"{expires}:{method.upper()}:{path}".encode(),
+        hashlib.sha256,
+    ).hexdigest()
+    return f"{expires}.{signature}"
+
+
+def verify_profile_token(token: str, method: str, path: str) -> bool:
+    """Checks a profiling header against the shared secret."""
+    if not settings.PROFILING_SECRET or "." not in token:
+        return False
+
+    expires, signature = token.split(".", 1)
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+
+    expected = hmac.new(
+        settings.PROFILING_SECRET.encode(),
+        f"{expires}:{method.upper()}:{path}".encode(),
+        hashlib.sha256,
+    ).hexdigest()
+    return hmac.compare_digest(signature, expected)
+
+
+def _sampled() -> bool:
+    """Rolls the dice for sampling-based profiling."""
+    return random.random() < settings.PROFILING_SAMPLE_RATE
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles signed or sampled requests and
+    records slow ones."""
+
+    def __init__(self, app: Callable) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable):
+        if scope["type"] != "http" or not profiling_active():
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope["method"], scope["path"]
+        headers = dict(scope.get("headers") or [])
+        token = headers.get(PROFILE_HEADER.encode(), b"").decode()
+        capture = verify_profile_token(token, method, path) or _sampled()
+
+        profile = RequestProfile(f"{method} {path}", capture_profile=capture)
+
+        async def send_wrapper(message: dict) -> None:
+            if (message["type"] == "http.response.start"
+                    and profile.endpoint_finished is not None):
+                # Response validation and serialization run between the
+                # end of the endpoint and the start of the response.
+                profile.sections["serialization"] = (
+                    time.perf_counter() - profile.endpoint_finished)
+            await send(message)
+
+        context_token = _current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_profile.reset(context_token)
+            profile.finish()
+
+
+def profile_endpoint(func: Callable) -> Callable:
+    """Runs a sync endpoint under the request's profiler."""
+    if inspect.iscoroutinefunction(func):
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        profile = current_profile()
+        if profile is None:
+            return func(*args, **kwargs)
+        try:
+            with profile.section("endpoint"):
+                return profile.run(func, *args, **kwargs)
+        finally:
+            profile.endpoint_finished = time.perf_counter()
+
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """Route class whose endpoints take part in request profiling."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs: Any) -> None:
+        super().__init__(path, profile_endpoint(endpoint), **kwargs)
+
+
+@contextmanager
+def profile_job(name: str) -> Iterator[Optional[RequestProfile]]:
+    """Profiles a background job when sampled and records it when slow."""
+    if not profiling_active():
+        yield None
+        return
+
+    profile = RequestProfile(name, capture_profile=_sampled())
+    context_token = _current_profile.set(profile)
+    if profile.profiler is not None:
+        profile.profiler.enable()
+    try:
+        yield profile
+    finally:
+        if profile.profiler is not None:
+            profile.profiler.disable()
+        _current_profile.reset(context_token)
+        profile.finish()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    """Notes when a statement starts while a profile is active."""
+    if _current_profile.get() is not None:
+        conn.info.setdefault(QUERY_STARTED_KEY, []).append(
+            time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    """Records the statement duration on the active profile."""
+    profile = _current_profile.get()
+    started = conn.info.get(QUERY_STARTED_KEY)
+    if profile is not None and started:
+        profile.record_sql(statement, time.perf_counter() - started.pop())
@@ -0,0 +1,69 @@
+"""Compare order inserts/sec with per-request commits and group commit.
+
+Runs against DATABASE_URI (or DATABASE_URI_TEST under pytest):
+
+    python -m benchmarks.bench_group_commit --threads 16 --orders 5000
+"""
+import argparse
+import time
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.database import SessionLocal, create_db_and_tables
+from app.orders.group_commit import GroupCommitWriter
+from app.orders.schemas import CreateOrderSchema
+from app.orders.services import OrderService
+
+ORDER = CreateOrderSchema(
+    type="limit", side="buy", instrument="BENCHMARK001",
+    limit_price=Decimal("100.00"), quantity=10)
+
+
+def insert_with_own_commit(_: int) -> None:
+    """Current path: one session and one commit per order."""
+    db = SessionLocal()
+    try:
+        OrderService.create_order(db, ORDER)
+    finally:
+        db.close()
+
+
+def run(label: str, insert_one, orders: int, threads: int) -> float:
+    """Inserts `orders` rows from `threads` threads; returns inserts/sec."""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(insert_one, range(orders)))
+    elapsed = time.perf_counter() - started
+    rate = orders / elapsed
+    print(f"{label:<28} {orders:>7} orders in {elapsed:7.2f}s "
+          f"= {rate:10.1f} inserts/sec")
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    parser.add_argument("--max-batch", type=int, default=100)
+    args = parser.parse_args()
+
+    create_db_and_tables()
+
+    baseline = run(
+        "per-request commit", insert_with_own_commit,
+        args.orders, args.threads)
+
+    writer = GroupCommitWriter(
+        window_ms=args.window_ms, max_batch=args.max_batch)
+    grouped = run(
+        f"group commit ({args.window_ms}ms/{args.max_batch})",
+        lambda _: writer.submit(ORDER).result(),
+        args.orders, args.threads)
+    writer.stop()
+
+    print(f"speedup: {grouped / baseline:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Measure internal matching throughput of one instrument's order book.
+
+Submits random LIMIT orders around a mid price, so that roughly half of
+them cross, and reports orders/sec. Pure in-memory; no database needed:
+
+    python -m benchmarks.bench_order_book --orders 200000
+"""
+import argparse
+import random
+import time
+import uuid
+
+from app.orders.models import OrderSide
+from app.orders.order_book import OrderBook
+
+MID_PRICE = 10_000  # cents
+
+
+def generate_orders(count: int, spread: int, seed: int) -> list:
+    """Builds (id, side, price, quantity) tuples ahead of timing."""
+    rng = random.Random(seed)
+    sides = (OrderSide.BUY, OrderSide.SELL)
+    return [
+        (
+            uuid.UUID(int=rng.getrandbits(128)),
+            sides[rng.getrandbits(1)],
+            MID_PRICE + rng.randint(-spread, spread),
+            rng.randint(1, 100),
+        )
+        for _ in range(count)
+    ]
+
+
+def run(orders: list, rest_orders: int) -> None:
+    """Feeds the orders through one book and prints the rate."""
+    book = OrderBook("BENCHMARK001")
+    fills = 0
+    matched = 0
+    started = time.perf_counter()
+    for sequence, (order_id, side, price, quantity) in enumerate(orders):
+        taker, order_fills = book.submit(
+            order_id, side, price, quantity, expires_at=sequence + rest_orders)
+        fills += len(order_fills)
+        matched += taker.filled
+        # Stands in for the rest window, measured in orders instead of time.
+        book.expire(sequence)
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(orders):>9} orders in {elapsed:7.3f}s "
+          f"= {len(orders) / elapsed:12.1f} orders/sec, "
+          f"{elapsed / len(orders) * 1e6:6.2f}us/order")
+    print(f"{fills:>9} fills, {matched} matched quantity, "
+          f"{len(book)} orders resting at the end")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument(
+        "--spread", type=int, default=50,
+        help="Prices are drawn from mid +/- this many cents.")
+    parser.add_argument(
+        "--rest-orders", type=int, default=1_000,
+        help="How many later orders a resting order may match.")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    run(generate_orders(args.orders, args.spread, args.seed), args.rest_orders)
+
+
+if __name__ == "__main__":
+    main()
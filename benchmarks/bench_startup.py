@@ -0,0 +1,69 @@
+"""Compare API worker cold starts with create_all and the schema check.
+
+Each sample is a fresh interpreter that imports the app and prepares the
+schema the way a worker would on boot. Runs against DATABASE_URI:
+
+    python -m benchmarks.bench_startup --runs 10
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+MODES = ("create_all", "ensure_schema")
+
+
+def child(mode: str) -> None:
+    """Boots the app in this process and prints its timings as JSON."""
+    started = time.perf_counter()
+    import app.main  # noqa: F401
+    from app.core.database import create_db_and_tables
+    from app.core.schema import ensure_schema
+    imported = time.perf_counter()
+
+    if mode == "create_all":
+        create_db_and_tables()
+    else:
+        ensure_schema()
+    finished = time.perf_counter()
+
+    print(json.dumps({
+        "import_ms": (imported - started) * 1000,
+        "schema_ms": (finished - imported) * 1000,
+    }))
+
+
+def sample(mode: str) -> dict:
+    """Runs one cold start in a subprocess."""
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child", mode],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    # Leaves the database fully created and versioned, as after a deploy.
+    sample("ensure_schema")
+
+    for mode in MODES:
+        samples = [sample(mode) for _ in range(args.runs)]
+        import_ms = statistics.median(s["import_ms"] for s in samples)
+        schema_ms = statistics.median(s["schema_ms"] for s in samples)
+        print(f"{mode:<14} import {import_ms:8.1f}ms  schema {schema_ms:8.1f}ms"
+              f"  total {import_ms + schema_ms:8.1f}ms  (median of {args.runs})")
+
+
+if __name__ == "__main__":
+    main()